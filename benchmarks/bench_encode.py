@@ -0,0 +1,54 @@
+from benchmarks.bench_parser import fixtures, measure
+from src.scrape.base_scraper import BaseScraper
+from src.scrape.info_drama_scraper import InfoDramaScraper
+from src.utility.lib import Logger, MsgSpecJSONResponse
+from src.utility.models import DramaInfo, DramaSummary
+from typing import Any, Callable, List
+import logging
+import msgspec
+import tracemalloc
+
+ROUNDS = 2000
+COPIES = 1000
+
+
+def scrape(scraper_cls: type, path: str, params: dict) -> Any:
+    with open(file=path, mode="r", encoding="utf-8") as f:
+        scraper = scraper_cls(BaseScraper.parser.parse(f.read()), {**params, "limit": 100})
+
+    if isinstance(scraper, InfoDramaScraper):
+        scraper.set_info_data()
+        return scraper.data
+
+    scraper.set_search_results()
+    return scraper.search_results["dramas"]
+
+
+def resident_size(build: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    copies: List[Any] = [build() for _ in range(COPIES)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+
+    return size / COPIES / 1024
+
+
+if __name__ == "__main__":
+    Logger.logger.setLevel(logging.WARNING)
+
+    print(f"{'page':<8}{'payload':<9}{'encode/s':>12}{'KiB/copy':>12}")
+
+    for page, (scraper_cls, path, params) in fixtures.items():
+        structs = scrape(scraper_cls, path, params)
+        dicts = msgspec.to_builtins(structs)
+        encoded = MsgSpecJSONResponse.render(structs)
+        struct_type = DramaInfo if page == "info" else List[DramaSummary]
+
+        assert MsgSpecJSONResponse.render(dicts) == encoded
+
+        for name, payload, decode_type in (("dict", dicts, Any), ("struct", structs, struct_type)):
+            encode_rate = measure(lambda: MsgSpecJSONResponse.render(payload), rounds=ROUNDS)
+            size = resident_size(lambda: msgspec.json.decode(encoded, type=decode_type))
+
+            print(f"{page:<8}{name:<9}{encode_rate:>12.1f}{size:>12.2f}")
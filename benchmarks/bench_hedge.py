@@ -0,0 +1,61 @@
+from asyncio import Semaphore, gather, run, sleep
+from random import Random
+from src.scrape.http_client import HttpClient
+from src.utility.hedge import Hedger
+from src.utility.lib import Logger
+from statistics import quantiles
+from time import perf_counter
+from typing import Tuple
+import logging
+
+REQUESTS = 2000
+CONCURRENCY = 32
+LATENCY = 0.02
+SLOW_LATENCY = 0.5
+SLOW_SHARE = 0.03
+
+
+class FakeResponse:
+    status_code = 200
+
+
+class FakeUpstream:
+    # Most pages come back quickly; a few get stuck behind something slow upstream.
+    def __init__(self) -> None:
+        self.rng = Random(0)
+        self.requests = 0
+
+    async def get(self, url: str, headers: dict) -> FakeResponse:
+        self.requests += 1
+        await sleep(SLOW_LATENCY if self.rng.random() < SLOW_SHARE else LATENCY)
+
+        return FakeResponse()
+
+
+async def load(hedger: Hedger) -> Tuple[float, float, float, int]:
+    upstream = FakeUpstream()
+    HttpClient.client = upstream
+    HttpClient.hedger = hedger
+    semaphore = Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def request() -> None:
+        async with semaphore:
+            start = perf_counter()
+            await HttpClient.get(url="https://filmarks.com/", headers={})
+            latencies.append(perf_counter() - start)
+
+    await gather(*(request() for _ in range(REQUESTS)))
+    p50, p95, p99 = (quantiles(latencies, n=100)[idx] * 1000 for idx in (49, 94, 98))
+
+    return p50, p95, p99, upstream.requests - REQUESTS
+
+
+if __name__ == "__main__":
+    Logger.logger.setLevel(logging.ERROR)
+    print(f"requests: {REQUESTS}, latency: {LATENCY * 1000:.0f} ms, {SLOW_SHARE:.0%} at {SLOW_LATENCY * 1000:.0f} ms")
+    print(f"{'hedge %':<9}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'extra':>7}")
+
+    for percent in (0, 5, 10):
+        p50, p95, p99, extra = run(load(Hedger(percent=percent, quantile=0.95, min_delay=0.01, min_samples=20)))
+        print(f"{percent:<9}{p50:>8.1f}{p95:>8.1f}{p99:>8.1f}{extra:>7}")
@@ -0,0 +1,84 @@
+from asyncio import gather, run, sleep
+from fastapi import HTTPException
+from src.scrape.http_client import HttpClient
+from src.utility.limiter import AdaptiveLimiter
+from src.utility.lib import Logger
+from statistics import quantiles
+from time import perf_counter
+from typing import List, Tuple
+import logging
+
+CALLERS = 64
+DURATION = 5.0
+CAPACITY = 16
+LATENCY = 0.05
+
+
+class FakeResponse:
+    def __init__(self, status_code: int) -> None:
+        self.status_code = status_code
+
+
+class FakeUpstream:
+    # Slows down as it fills up, and throttles everything beyond its capacity.
+    def __init__(self) -> None:
+        self.in_flight = 0
+
+    async def get(self, url: str, headers: dict) -> FakeResponse:
+        self.in_flight += 1
+
+        try:
+            if self.in_flight > CAPACITY:
+                await sleep(LATENCY / 10)
+                return FakeResponse(429)
+
+            await sleep(LATENCY * (1 + self.in_flight / CAPACITY))
+            return FakeResponse(200)
+
+        finally:
+            self.in_flight -= 1
+
+
+async def load(limiter: AdaptiveLimiter) -> Tuple[float, float, float, float]:
+    HttpClient.client = FakeUpstream()
+    HttpClient.limiter = limiter
+    latencies: List[float] = []
+    throttled = rejected = 0
+    end = perf_counter() + DURATION
+
+    async def caller() -> None:
+        nonlocal throttled, rejected
+
+        while perf_counter() < end:
+            start = perf_counter()
+
+            try:
+                resp = await HttpClient.get(url="https://filmarks.com/", headers={})
+
+            except HTTPException:
+                rejected += 1
+                continue
+
+            if resp.status_code == 429:
+                throttled += 1
+
+            else:
+                latencies.append(perf_counter() - start)
+
+    await gather(*(caller() for _ in range(CALLERS)))
+    p99 = quantiles(latencies, n=100)[98]
+
+    return len(latencies) / DURATION, throttled / DURATION, rejected, p99 * 1000
+
+
+if __name__ == "__main__":
+    Logger.logger.setLevel(logging.ERROR)
+    print(f"callers: {CALLERS}, upstream capacity: {CAPACITY}, upstream latency: {LATENCY * 1000:.0f} ms")
+    print(f"{'limiter':<10}{'ok/s':>8}{'429/s':>8}{'rejected':>10}{'p99 ms':>9}{'window':>8}")
+
+    for name, limiter in (
+        ("none", AdaptiveLimiter(initial=0, minimum=1, maximum=0, latency_target=1.0)),
+        ("aimd", AdaptiveLimiter(initial=10, minimum=2, maximum=50, latency_target=1.0)),
+    ):
+        ok, throttled, rejected, p99 = run(load(limiter))
+        print(f"{name:<10}{ok:>8.0f}{throttled:>8.0f}{rejected:>10}{p99:>9.1f}{limiter.limit:>8.1f}")
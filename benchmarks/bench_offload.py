@@ -0,0 +1,72 @@
+from asyncio import Semaphore, gather, run, sleep
+from benchmarks.bench_parser import fixtures
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import Request
+from multiprocessing import get_context
+from os import cpu_count
+from src.scrape.extract_pool import ExtractPool
+from src.scrape.http_client import HttpClient
+from src.scrape.info_drama_scraper import InfoDramaScraper
+from src.utility.lib import Logger
+from src.utility.models import Filmarks
+from time import perf_counter
+import logging
+
+REQUESTS = 400
+CONCURRENCY = 32
+LATENCY = 0.05
+
+
+class FakeResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+def quiet() -> None:
+    Logger.logger.setLevel(logging.WARNING)
+
+
+async def throughput(html: str) -> float:
+    async def get(url: str, headers: dict) -> FakeResponse:
+        await sleep(LATENCY)
+        return FakeResponse(html)
+
+    HttpClient.get = get
+    endpoint = Filmarks.Endpoints.INFO_DRAMAS.value
+    semaphore = Semaphore(CONCURRENCY)
+
+    async def scrape(idx: int) -> None:
+        req = Request({"type": "http", "path_params": {"drama_series_id": idx, "drama_season_id": idx}, "query_string": b""})
+
+        async with semaphore:
+            if ExtractPool.executor is not None:
+                await InfoDramaScraper.scrape_in_pool(endpoint, req)
+
+            else:
+                (await InfoDramaScraper.scrape(endpoint, req)).extract()
+
+    await gather(*(scrape(idx) for idx in range(CONCURRENCY)))
+    start = perf_counter()
+    await gather(*(scrape(idx) for idx in range(REQUESTS)))
+
+    return REQUESTS / (perf_counter() - start)
+
+
+if __name__ == "__main__":
+    quiet()
+
+    with open(file=fixtures["info"][1], mode="r", encoding="utf-8") as f:
+        html = f.read()
+
+    print(f"cores: {cpu_count()}, upstream latency: {LATENCY * 1000:.0f} ms, concurrency: {CONCURRENCY}")
+    print(f"{'mode':<8}{'workers':>8}{'req/s':>10}")
+    print(f"{'inline':<8}{'-':>8}{run(throughput(html)):>10.1f}")
+
+    for workers in sorted({1, 2, 4, cpu_count() or 1}):
+        ExtractPool.executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=quiet)
+
+        try:
+            print(f"{'pool':<8}{workers:>8}{run(throughput(html)):>10.1f}")
+
+        finally:
+            ExtractPool.close()
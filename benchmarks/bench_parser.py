@@ -0,0 +1,72 @@
+from src.scrape.base_scraper import BaseScraper
+from src.scrape.info_drama_scraper import InfoDramaScraper
+from src.scrape.parser import Node, Parser
+from src.scrape.search_drama_scraper import SearchDramaScraper
+from src.utility.lib import Logger
+from time import perf_counter
+from typing import Callable, Dict
+import logging
+import tracemalloc
+
+ROUNDS = 200
+
+fixtures = {
+    "info": (InfoDramaScraper, "tests/___info_drama.html", {"drama_series_id": 11358, "drama_season_id": 15763}),
+    "search": (SearchDramaScraper, "tests/___search_dramas.html", {"q": "あなたの番です", "limit": 20}),
+}
+
+
+def extract(scraper_cls: type, html: str, params: Dict) -> None:
+    extract_tree(scraper_cls, BaseScraper.parser.parse(html), params)
+
+
+def extract_tree(scraper_cls: type, tree: Node, params: Dict) -> None:
+    scraper = scraper_cls(tree, params)
+
+    if isinstance(scraper, InfoDramaScraper):
+        scraper.set_info_data()
+    else:
+        scraper.set_search_results()
+
+
+def measure(func: Callable[[], None], rounds: int = ROUNDS) -> float:
+    func()
+    start = perf_counter()
+
+    for _ in range(rounds):
+        func()
+
+    return rounds / (perf_counter() - start)
+
+
+def peak_memory(func: Callable[[], None]) -> float:
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak / 1024
+
+
+if __name__ == "__main__":
+    Logger.logger.setLevel(logging.WARNING)
+
+    print(f"{'page':<8}{'parser':<8}{'mode':<9}{'parse/s':>12}{'extract/s':>12}{'parse+extract/s':>18}{'peak KiB':>12}")
+
+    for page, (scraper_cls, path, params) in fixtures.items():
+        with open(file=path, mode="r", encoding="utf-8") as f:
+            full = f.read()
+
+        for name in ("bs4", "lxml"):
+            BaseScraper.parser = Parser.create(name)
+
+            for mode in ("full", "partial"):
+                slice_html = (lambda: scraper_cls.regions.slice(full)) if mode == "partial" else (lambda: full)
+
+                parse_rate = measure(lambda: BaseScraper.parser.parse(slice_html()))
+                tree = BaseScraper.parser.parse(slice_html())
+                extract_rate = measure(lambda: extract_tree(scraper_cls, tree, params))
+                total_rate = measure(lambda: extract(scraper_cls, slice_html(), params))
+                peak = peak_memory(lambda: extract(scraper_cls, slice_html(), params))
+
+                print(f"{page:<8}{name:<8}{mode:<9}{parse_rate:>12.1f}{extract_rate:>12.1f}{total_rate:>18.1f}{peak:>12.1f}")
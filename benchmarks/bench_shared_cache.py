@@ -0,0 +1,69 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from os import cpu_count
+from random import Random
+from src.utility.cache import TTLCache
+from src.utility.lib import EncodedContent
+from src.utility.shared_cache import SharedTTLCache
+from statistics import quantiles
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from typing import List, Tuple
+
+KEYS = 1000
+REQUESTS = 4000
+ZIPF = 1.1
+LATENCY = 0.02
+
+
+def keys(worker: int, workers: int) -> List[int]:
+    # Every worker draws from the same popularity distribution, as behind a round-robin load balancer.
+    rng = Random(worker)
+    weights = [1 / (rank + 1) ** ZIPF for rank in range(KEYS)]
+
+    return rng.choices(range(KEYS), weights=weights, k=REQUESTS // workers)
+
+
+def serve(worker: int, workers: int, path: str | None) -> Tuple[int, int, List[float]]:
+    if path is None:
+        cache = TTLCache(max_entries=KEYS, max_bytes=1 << 30, ttl=3600)
+
+    else:
+        cache = SharedTTLCache(path=path, name="info", max_entries=KEYS, max_bytes=1 << 30, ttl=3600, dumps=EncodedContent.dumps, loads=EncodedContent.loads)
+
+    latencies = []
+
+    for key in keys(worker, workers):
+        start = perf_counter()
+
+        if cache.get(key) is None:
+            sleep(LATENCY)
+            encoded = EncodedContent.create({"series_id": key, "season_id": key, "data": {"title": "ドラマ" * 200}, "scrape_date": ""})
+            cache.set(key, encoded, size=len(encoded.body))
+
+        latencies.append(perf_counter() - start)
+
+    return cache.hits, cache.misses, latencies
+
+
+def run(workers: int, path: str | None) -> Tuple[float, float, float, float]:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+        results = list(executor.map(serve, range(workers), [workers] * workers, [path] * workers))
+
+    hits = sum(result[0] for result in results)
+    misses = sum(result[1] for result in results)
+    latencies = sorted(latency for result in results for latency in result[2])
+    p50, p99 = (quantiles(latencies, n=100)[idx] for idx in (49, 98))
+
+    return hits / (hits + misses), misses, p50 * 1000, p99 * 1000
+
+
+if __name__ == "__main__":
+    print(f"cores: {cpu_count()}, keys: {KEYS}, requests: {REQUESTS}, upstream latency: {LATENCY * 1000:.0f} ms")
+    print(f"{'cache':<8}{'workers':>8}{'hit ratio':>11}{'upstream':>10}{'p50 ms':>9}{'p99 ms':>9}")
+
+    for workers in (1, 4, 8):
+        with TemporaryDirectory() as directory:
+            for mode, path in (("local", None), ("shared", f"{directory}/shared.db")):
+                ratio, misses, p50, p99 = run(workers, path)
+                print(f"{mode:<8}{workers:>8}{ratio:>11.3f}{misses:>10}{p50:>9.3f}{p99:>9.3f}")
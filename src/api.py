@@ -1,18 +1,43 @@
 from aiocron import crontab
-from fastapi import Depends, FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from httpx import AsyncClient
 from math import floor
 from os import environ
-from src.scrape.scrape_service import search_scrape_drama, info_scrape_drama
-from src.utility.lib import Logger, MsgSpecJSONResponse
-from src.utility.models import Filmarks, SearchParams
-from typing import Annotated, Any, Dict
+from src.scrape.base_scraper import BaseScraper
+from src.scrape.extract_pool import ExtractPool
+from src.scrape.http_client import HttpClient
+from src.scrape.page_store import PageStore
+from src.scrape.scrape_service import batch_info_scrape_drama, info_cache, info_scrape_drama, is_stream_requested, list_cache, list_scrape_drama, local_search_drama, prefetcher, search_scrape_drama, stream_search_scrape_drama
+from src.utility.compression import CompressionMiddleware
+from src.utility.config import Config
+from src.utility.deadline import DeadlineMiddleware
+from src.utility.lib import CustomException, Logger, MsgSpecJSONResponse
+from src.utility.metrics import Metrics, MetricsMiddleware
+from src.utility.models import BatchParams, Filmarks, SearchParams
+from src.utility.profiler import ProfileMiddleware, Profiler
+from typing import Annotated, Any, AsyncIterator, Dict
+
+
+@asynccontextmanager
+async def lifespan(api: FastAPI) -> AsyncIterator[None]:
+    await HttpClient.open()
+    ExtractPool.open()
+    PageStore.open()
+
+    yield
+
+    PageStore.close()
+    ExtractPool.close()
+    await HttpClient.close()
 
 
 api = FastAPI(
     title="MarkuAPI",
     default_response_class=MsgSpecJSONResponse,
+    lifespan=lifespan,
 )
 api.add_middleware(
     CORSMiddleware,
@@ -21,40 +46,99 @@ api.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+api.add_middleware(CompressionMiddleware)
+api.add_middleware(DeadlineMiddleware)
+api.add_middleware(ProfileMiddleware)
+api.add_middleware(MetricsMiddleware)
+
+Metrics.collect("cache", "cache", {
+    "info": info_cache.stats,
+    "list": list_cache.stats,
+    "page": BaseScraper.pages.stats,
+}, counters=frozenset({"hits", "misses", "evictions", "stale_hits", "refreshes", "claimed_elsewhere"}))
+Metrics.collect("upstream_window", "upstream", {"filmarks": lambda: HttpClient.limiter.stats()}, counters=frozenset({"increases", "decreases", "rejected"}))
+Metrics.collect("upstream_bucket", "upstream", {"filmarks": lambda: HttpClient.bucket.stats()}, counters=frozenset({"throttled", "rejected"}))
+Metrics.collect("upstream_breaker", "upstream", {"filmarks": lambda: HttpClient.breaker.stats()}, counters=frozenset({"opens", "rejected"}))
+Metrics.collect("upstream_hedge", "upstream", {"filmarks": lambda: HttpClient.hedger.stats()}, counters=frozenset({"requests", "hedged", "wins"}))
+Metrics.collect("single_flight", "cache", {"page": BaseScraper.flights.stats}, counters=frozenset({"leaders", "collapsed"}))
+Metrics.collect("prefetch", "cache", {"info": prefetcher.stats}, counters=frozenset({"scheduled", "dropped", "prefetched", "failed", "hits"}))
 
 
 @api.get("/")
-def index() -> Dict[str, Any]:
+async def index() -> Dict[str, Any]:
 
     return {
         "detail": "A basic web scraper API for Filmarks Dramas.",
     }
 
 
-@api.get("/search/dramas")
-def search_dramas(search_params: Annotated[SearchParams, Depends()], req: Request) -> Dict[str, Any]:
+@api.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+
+    return Response(content=Metrics.render(), media_type="text/plain; version=0.0.4")
+
 
-    return search_scrape_drama(
+@api.get("/profiles", include_in_schema=False)
+async def profiles(req: Request) -> Dict[str, Any]:
+    if not Profiler.authorized(req.headers):
+        raise CustomException.not_found()
+
+    return {
+        "profiles": list(Profiler.profiles),
+    }
+
+
+@api.get("/search/dramas")
+async def search_dramas(search_params: Annotated[SearchParams, Depends()], req: Request) -> Response:
+    if search_params.source == "local":
+        return local_search_drama(
+            req=req,
+            limit=search_params.limit,
+            page=search_params.page,
+            message="Failed to search dramas.",
+        )
+
+    if is_stream_requested(req):
+        return await stream_search_scrape_drama(
+            endpoint=Filmarks.Endpoints.SEARCH_DRAMAS.value,
+            req=req,
+            message="Failed to search dramas.",
+        )
+
+    return MsgSpecJSONResponse(content=await search_scrape_drama(
         endpoint=Filmarks.Endpoints.SEARCH_DRAMAS.value,
         req=req,
         message="Failed to search dramas.",
-    )
+    ))
 
 
 @api.get("/dramas/{drama_series_id}/{drama_season_id}")
-def info_dramas(drama_series_id: int, drama_season_id: int, req: Request) -> Dict[str, Any]:
+async def info_dramas(drama_series_id: int, drama_season_id: int, req: Request) -> Response:
 
-    return info_scrape_drama(
+    return await info_scrape_drama(
         endpoint=Filmarks.Endpoints.INFO_DRAMAS.value,
         req=req,
         message=f"Failed to retrieve drama information with series ID: {drama_series_id} and season ID: {drama_season_id}.",
     )
 
 
+@api.post("/dramas/batch")
+async def batch_info_dramas(batch_params: BatchParams) -> StreamingResponse:
+
+    return StreamingResponse(
+        content=batch_info_scrape_drama(
+            endpoint=Filmarks.Endpoints.INFO_DRAMAS.value,
+            dramas=batch_params.dramas,
+            message="Failed to retrieve drama information with series ID: {series_id} and season ID: {season_id}.",
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
 @api.get("/list-drama/trend")
-def list_dramas_trending(search_params: Annotated[SearchParams, Depends()], req: Request) -> Dict[str, Any]:
+async def list_dramas_trending(search_params: Annotated[SearchParams, Depends()], req: Request) -> Response:
 
-    return search_scrape_drama(
+    return await list_scrape_drama(
         endpoint=Filmarks.Endpoints.LIST_DRAMAS_TRENDING.value,
         req=req,
         message="Failed to fetch trending dramas.",
@@ -62,9 +146,9 @@ def list_dramas_trending(search_params: Annotated[SearchParams, Depends()], req:
 
 
 @api.get("/list-drama/country/{country_id}")
-def list_dramas_country(country_id: int, search_params: Annotated[SearchParams, Depends()], req: Request) -> Dict[str, Any]:
+async def list_dramas_country(country_id: int, search_params: Annotated[SearchParams, Depends()], req: Request) -> Response:
 
-    return search_scrape_drama(
+    return await list_scrape_drama(
         endpoint=Filmarks.Endpoints.LIST_DRAMAS_COUNTRY.value,
         req=req,
         message=f"Failed to fetch dramas from country with ID: {country_id}.",
@@ -72,16 +156,22 @@ def list_dramas_country(country_id: int, search_params: Annotated[SearchParams,
 
 
 @api.get("/list-drama/year/{year}")
-def list_dramas_year(year: int, search_params: Annotated[SearchParams, Depends()], req: Request) -> Dict[str, Any]:
+async def list_dramas_year(year: int, search_params: Annotated[SearchParams, Depends()], req: Request) -> Response:
     req.path_params["year_series"] = floor(year / 10) * 10
 
-    return search_scrape_drama(
+    return await list_scrape_drama(
         endpoint=Filmarks.Endpoints.LIST_DRAMAS_YEAR.value,
         req=req,
         message=f"Failed to fetch dramas from year: {year}.",
     )
 
 
+@crontab("* * * * *")
+async def refresh_list_dramas() -> None:
+
+    await list_cache.refresh_popular(count=Config.Cache.LIST_REFRESH_COUNT, horizon=60)
+
+
 @crontab("*/15 * * * *")
 async def heartbeat() -> None:
 
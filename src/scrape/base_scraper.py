@@ -1,10 +1,20 @@
-from bs4 import BeautifulSoup
 from fastapi import Request
+from src.scrape.extract_pool import ExtractPool
+from src.scrape.http_client import HttpClient
+from src.scrape.page_store import PageStore
+from src.scrape.parser import Node, Parser, Regions
+from src.utility.cache import PageEntry, TTLCache
+from src.utility.config import Config
+from src.utility.deadline import Deadline
 from src.utility.lib import CustomException, Logger
+from src.utility.metrics import Metrics
 from src.utility.models import Filmarks
-from typing import Dict, Type, TypeVar
+from src.utility.single_flight import SingleFlight
+from hashlib import blake2b
+from time import time
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Tuple, Type, TypeVar
 from urllib.parse import urlencode
-import requests
+import httpx
 
 T = TypeVar("T", bound="BaseScraper")
 
@@ -14,44 +24,164 @@ class BaseScraper:
         "Referer": Filmarks.FILMARKS_BASE,
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36",        
     }
-
-    def __init__(self, soup: BeautifulSoup, params: Dict) -> None:
+    flights = SingleFlight()
+    parser = Parser.create(Config.Scrape.PARSER)
+    regions = Regions("p.main__status-ja")
+    # Parser backends for which cutting the page down to `regions` beats parsing it whole.
+    partial_parsers = frozenset({"bs4", "lxml"})
+    local_params = frozenset({"source", "stream", "__profile"})
+    pages = TTLCache(
+        max_entries=Config.Cache.PAGE_MAX_ENTRIES,
+        max_bytes=Config.Cache.PAGE_MAX_BYTES,
+        ttl=Config.Cache.PAGE_TTL,
+    )
+    # Parsed trees are budgeted at roughly what a BeautifulSoup tree takes per byte of HTML.
+    tree_weight = 20
+
+    def __init__(self, soup: Node, params: Dict) -> None:
         self.soup = soup
         self.params = params
 
     @classmethod
-    def scrape(cls: Type[T], endpoint: Dict[str, str], req: Request) -> T | None:
+    async def scrape(cls: Type[T], endpoint: Dict[str, str], req: Request) -> T | None:
+        cls._raise_if_invalid_endpoint(endpoint)
+
+        url, params = cls._locate(endpoint, req.path_params, req.query_params)
+
+        return await cls._build(endpoint, req, url, params)
+
+    @classmethod
+    async def scrape_in_pool(cls, endpoint: Dict[str, str], req: Request) -> Dict[str, Any]:
         cls._raise_if_invalid_endpoint(endpoint)
 
+        url, params = cls._locate(endpoint, req.path_params, req.query_params)
+        pages = await cls._load_pages(endpoint, req, url, params, cls._load_html)
+
+        # Pages are parsed and extracted together in the pool, so both count as extraction here.
+        with Metrics.stage("extract"):
+            return await Deadline.wait(ExtractPool.run(cls._extract, pages, dict(params)))
+
+    def extract(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @classmethod
+    def _extract(cls, pages: List[str], params: Dict) -> Dict[str, Any]:
+        return cls._from_pages([BaseScraper.parser.parse(html) for html in pages], params).extract()
+
+    @classmethod
+    async def _build(cls: Type[T], endpoint: Dict[str, str], req: Request, url: str, params: Dict) -> T:
+        return cls._from_pages(await cls._load_pages(endpoint, req, url, params, cls._load), params)
+
+    @classmethod
+    async def _load_pages(cls, endpoint: Dict[str, str], req: Request, url: str, params: Dict, load: Callable[[str], Awaitable[Any]]) -> List[Any]:
+        return [await load(url)]
+
+    @classmethod
+    def _from_pages(cls: Type[T], pages: List[Node], params: Dict) -> T:
+        return cls(pages[0], params)
+
+    @classmethod
+    def _locate(cls, endpoint: Dict[str, str], path_params: Mapping, query_params: Mapping) -> Tuple[str, Dict]:
+        query_params = {key: value for key, value in query_params.items() if key not in BaseScraper.local_params}
+
         if endpoint["type"] == "query":
-            params = req.query_params
-            url = Filmarks.create_filmarks_link(endpoint["path"] + "?" + urlencode(params))
+            params = query_params
+            url = Filmarks.create_filmarks_link(endpoint["path"] + "?" + urlencode(query_params))
 
         elif endpoint["type"] == "path":
-            params = req.path_params
-            url = Filmarks.create_filmarks_link(endpoint["path"].format(**params))
+            params = path_params
+            url = Filmarks.create_filmarks_link(endpoint["path"].format(**path_params))
 
         elif endpoint["type"] == "path+query":
-            params = {**req.query_params, **req.path_params}
-            url = Filmarks.create_filmarks_link(endpoint["path"].format(**req.path_params) + "?" + urlencode(req.query_params))
+            params = {**query_params, **path_params}
+            url = Filmarks.create_filmarks_link(endpoint["path"].format(**path_params) + "?" + urlencode(query_params))
 
         else:
             raise ValueError("type can only be 'path', 'query', or 'path+query'!")
 
-        try:
-            with requests.Session() as session:
-                resp = session.get(url=url, headers=BaseScraper.headers)
-                soup = BeautifulSoup(resp.text, "lxml")
+        return url, params
+
+    @classmethod
+    async def _load(cls, url: str) -> Node:
+        return await Deadline.wait(BaseScraper.flights.do(url, lambda: cls._fetch(url)))
 
-                cls._raise_if_page_not_found(soup)
+    @classmethod
+    async def _load_html(cls, url: str) -> str:
+        return await Deadline.wait(BaseScraper.flights.do(("html", url), lambda: cls._fetch_html(url)))
 
-                return cls(soup, params)
+    @classmethod
+    async def _fetch(cls, url: str) -> Node:
+        page, unchanged = await cls._fetch_page(url)
 
-        except requests.exceptions.RequestException as e:
+        if page.soup is not None and page.parser == BaseScraper.parser.name:
+            return page.soup
+
+        with Metrics.stage("parse"):
+            soup = BaseScraper.parser.parse(page.html)
+
+        if not unchanged:
+            cls._raise_if_page_not_found(soup)
+
+        page.soup, page.parser = soup, BaseScraper.parser.name
+        BaseScraper.pages.set(url, page, size=len(page.html) * (1 + cls.tree_weight))
+
+        if not unchanged:
+            PageStore.set(url, page)
+
+        return soup
+
+    @classmethod
+    async def _fetch_html(cls, url: str) -> str:
+        page, unchanged = await cls._fetch_page(url)
+
+        if not unchanged:
+            # Pages headed for the process pool are only parsed there, so check the (tiny) status region here.
+            cls._raise_if_page_not_found(BaseScraper.parser.parse(BaseScraper.regions.slice(page.html)))
+            BaseScraper.pages.set(url, page, size=len(page.html))
+            PageStore.set(url, page)
+
+        return page.html
+
+    @classmethod
+    async def _fetch_page(cls, url: str) -> Tuple[PageEntry, bool]:
+        cached = BaseScraper.pages.get(url)
+
+        # After a restart the in-memory cache is empty, but pages persisted by earlier runs are still usable.
+        if cached is None and (cached := PageStore.get(url)) is not None:
+            BaseScraper.pages.set(url, cached, size=len(cached.html))
+
+        if cached is not None and time() - cached.fetched_at < Config.Cache.PAGE_FRESH_TTL:
+            return cached, True
+
+        headers = BaseScraper.headers if cached is None else {**BaseScraper.headers, **cached.validators()}
+
+        try:
+            resp = await HttpClient.get(url=url, headers=headers)
+
+        except httpx.HTTPError as e:
             Logger.err(f"Request to Filmarks failed: '{e}'")
 
             raise CustomException.service_unavailable()
 
+        if cached is not None and resp.status_code == 304:
+            cached.fetched_at = time()
+            PageStore.touch(url, cached)
+
+            return cached, True
+
+        html = cls.regions.slice(resp.text) if Config.Scrape.PARTIAL_PARSE and BaseScraper.parser.name in cls.partial_parsers else resp.text
+        digest = blake2b(html.encode(), digest_size=16).digest()
+        etag, last_modified = resp.headers.get("etag"), resp.headers.get("last-modified")
+
+        # Without usable validators upstream, an unchanged region still spares the parse.
+        if cached is not None and cached.digest == digest:
+            cached.etag, cached.last_modified, cached.fetched_at = etag, last_modified, time()
+            PageStore.touch(url, cached)
+
+            return cached, True
+
+        return PageEntry(html=html, digest=digest, etag=etag, last_modified=last_modified, fetched_at=time()), False
+
     @staticmethod
     def _raise_if_invalid_endpoint(endpoint: Dict[str, str]) -> None:
         if endpoint not in Filmarks.Endpoints:
@@ -60,10 +190,10 @@ class BaseScraper:
             raise CustomException.not_found()
 
     @staticmethod
-    def _raise_if_page_not_found(soup: BeautifulSoup) -> None:
-        status = soup.select_one("p.main__status-ja")
+    def _raise_if_page_not_found(soup: Node) -> None:
+        status = BaseScraper.parser.select_one(soup, "p.main__status-ja")
 
-        if status and status.text.strip() == "お探しのページは見つかりません。":
+        if status is not None and BaseScraper.parser.text(status).strip() == "お探しのページは見つかりません。":
             Logger.err("Invalid Filmarks page requested")
 
             raise CustomException.not_found()
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from heapq import nlargest
+from msgspec import Struct
+from src.utility.models import DramaInfo, DramaSummary, PersonInfo
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Set, Tuple
+from unicodedata import normalize
+
+DramaKey = Tuple[int, int]
+
+
+class IndexedDrama(Struct, gc=False):
+    summary: DramaSummary
+    original_title: str | None
+    fields: Dict[str, str]
+    popularity: Tuple[float, int]
+
+
+class DramaIndex:
+    # A match in a heavier field always outranks any combination of lighter ones.
+    weights = {"title": 16, "original_title": 8, "cast": 4, "director": 2, "genre": 1}
+
+    def __init__(self, max_dramas: int) -> None:
+        self.max_dramas = max_dramas
+
+        self.dramas: OrderedDict[DramaKey, IndexedDrama] = OrderedDict()
+        self.postings: Dict[Tuple[str, str], Set[DramaKey]] = {}
+
+    def add(self, drama: DramaSummary, original_title: str | None = None) -> None:
+        if self.max_dramas <= 0:
+            return
+
+        key = (drama.series_id, drama.season_id)
+
+        if (previous := self.dramas.pop(key, None)) is not None:
+            self._unlink(key, previous)
+            original_title = original_title or previous.original_title
+
+        fields = {
+            "title": self.normalize(drama.title),
+            "original_title": self.normalize(original_title or ""),
+            "cast": "\n".join(map(self.normalize, drama.cast or [])),
+            "director": "\n".join(map(self.normalize, drama.director or [])),
+            "genre": "\n".join(map(self.normalize, drama.genre or [])),
+        }
+        popularity = (drama.rating if isinstance(drama.rating, float) else -1.0, drama.mark_count)
+        self.dramas[key] = IndexedDrama(summary=drama, original_title=original_title, fields=fields, popularity=popularity)
+
+        for posting in self._postings(fields):
+            self.postings.setdefault(posting, set()).add(key)
+
+        while len(self.dramas) > self.max_dramas:
+            self._unlink(*self.dramas.popitem(last=False))
+
+    def add_info(self, series_id: int, season_id: int, info: DramaInfo) -> None:
+        def names(people: List[PersonInfo] | None) -> List[str] | None:
+            return [person.name for person in people] if people else None
+
+        self.add(DramaSummary(
+            title=info.title,
+            rating=info.rating,
+            mark_count=info.mark_count,
+            clip_count=info.clip_count,
+            series_id=series_id,
+            season_id=season_id,
+            link=info.link,
+            poster=info.poster,
+            release_date=info.release_date,
+            country_of_origin=info.country_of_origin,
+            playback_time=info.playback_time,
+            genre=info.genre,
+            director=names(info.director),
+            scriptwriter=names(info.scriptwriter),
+            cast=names(info.cast),
+        ), original_title=info.original_title)
+
+    async def tap(self, dramas: AsyncIterable[DramaSummary]) -> AsyncIterator[DramaSummary]:
+        async for drama in dramas:
+            if isinstance(drama, DramaSummary): self.add(drama)
+
+            yield drama
+
+    def search(self, query: str, limit: int, page: int = 1) -> List[DramaSummary]:
+        if not (query := self.normalize(query)):
+            return []
+
+        grams = self._grams(query)
+        scores: Dict[DramaKey, int] = {}
+
+        for field, weight in self.weights.items():
+            postings = sorted((self.postings.get((field, gram), set()) for gram in grams), key=len)
+            matches: Iterable[DramaKey] = postings[0].intersection(*postings[1:])
+
+            # Up to two characters the query is its own n-gram; beyond that, shared n-grams only make a candidate.
+            if len(query) > 2:
+                matches = [key for key in matches if query in self.dramas[key].fields[field]]
+
+            for key in matches:
+                scores[key] = scores.get(key, 0) + weight
+
+        ranked = nlargest(page * limit, (
+            (score, drama.fields["title"].startswith(query), *drama.popularity, key)
+            for key, score in scores.items()
+            if (drama := self.dramas[key])
+        ))
+
+        return [self.dramas[item[-1]].summary for item in ranked[(page - 1) * limit:]]
+
+    def clear(self) -> None:
+        self.dramas.clear()
+        self.postings.clear()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # Full/half-width forms and case fold together, and spacing inside names ("田中 圭") is ignored.
+        return "".join(normalize("NFKC", text).casefold().split())
+
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        # Character bigrams suit Japanese, which has no word boundaries; single characters cover one-character queries.
+        return {text} if len(text) == 1 else {text[idx:idx + 2] for idx in range(len(text) - 1)}
+
+    @staticmethod
+    def _postings(fields: Dict[str, str]) -> Set[Tuple[str, str]]:
+        postings = set()
+
+        for field, value in fields.items():
+            for part in value.split("\n"):
+                postings.update((field, char) for char in part)
+                postings.update((field, part[idx:idx + 2]) for idx in range(len(part) - 1))
+
+        return postings
+
+    def _unlink(self, key: DramaKey, drama: IndexedDrama) -> None:
+        for posting in self._postings(drama.fields):
+            if (keys := self.postings.get(posting)) is not None:
+                keys.discard(key)
+                if not keys: del self.postings[posting]
@@ -0,0 +1,29 @@
+from asyncio import get_running_loop
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from src.utility.config import Config
+from typing import Any, Callable
+
+
+class ExtractPool:
+    executor: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def open(cls) -> None:
+        if cls.executor is not None or Config.Scrape.WORKERS <= 0:
+            return
+
+        # Spawned rather than forked: the parent runs an event loop and the HTTP client's threads.
+        cls.executor = ProcessPoolExecutor(max_workers=Config.Scrape.WORKERS, mp_context=get_context("spawn"))
+
+    @classmethod
+    def close(cls) -> None:
+        if cls.executor is None:
+            return
+
+        cls.executor.shutdown(cancel_futures=True)
+        cls.executor = None
+
+    @classmethod
+    async def run(cls, func: Callable[..., Any], *args: Any) -> Any:
+        return await get_running_loop().run_in_executor(cls.executor, func, *args)
@@ -0,0 +1,131 @@
+from fastapi import HTTPException
+from httpx import AsyncClient, HTTPError, Limits, Response, Timeout
+from src.utility.breaker import CircuitBreaker
+from src.utility.config import Config
+from src.utility.deadline import Deadline
+from src.utility.hedge import Hedger
+from src.utility.lib import CustomException, Logger
+from src.utility.limiter import AdaptiveLimiter, TokenBucket
+from src.utility.metrics import Metrics
+from time import monotonic
+from typing import Dict
+
+
+class HttpClient:
+    client: AsyncClient | None = None
+    bucket = TokenBucket(rate=Config.Upstream.RATE, burst=Config.Upstream.BURST)
+    limiter = AdaptiveLimiter(
+        initial=Config.Upstream.INITIAL_CONCURRENCY,
+        minimum=Config.Upstream.MIN_CONCURRENCY,
+        maximum=Config.Upstream.MAX_CONCURRENCY,
+        latency_target=Config.Upstream.LATENCY_TARGET,
+    )
+    breaker = CircuitBreaker(
+        name="Filmarks",
+        window=Config.Breaker.WINDOW,
+        min_requests=Config.Breaker.MIN_REQUESTS,
+        failure_rate=Config.Breaker.FAILURE_RATE,
+        slow_call=Config.Breaker.SLOW_CALL,
+        open_duration=Config.Breaker.OPEN_DURATION,
+        probes=Config.Breaker.PROBES,
+    )
+    hedger = Hedger(
+        percent=Config.Hedge.PERCENT,
+        quantile=Config.Hedge.QUANTILE,
+        min_delay=Config.Hedge.MIN_DELAY,
+        min_samples=Config.Hedge.MIN_SAMPLES,
+    )
+
+    @classmethod
+    async def open(cls) -> None:
+        if cls.client is not None:
+            return
+
+        cls.client = AsyncClient(
+            http2=Config.Http.HTTP2,
+            follow_redirects=True,
+            timeout=Timeout(Config.Http.TIMEOUT),
+            limits=Limits(
+                max_connections=Config.Http.MAX_CONNECTIONS,
+                max_keepalive_connections=Config.Http.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.Http.KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls.client is None:
+            return
+
+        await cls.client.aclose()
+        cls.client = None
+
+    @classmethod
+    def has_capacity(cls, reserve: float) -> bool:
+        return cls.bucket.spare(reserve) and cls.limiter.spare(reserve)
+
+    @classmethod
+    async def get(cls, url: str, headers: Dict[str, str]) -> Response:
+        if cls.client is None:
+            await cls.open()
+
+        # Page fetches are idempotent GETs, so a slow one can be raced by a second attempt.
+        return await cls.hedger.run(lambda: cls._send(url, headers), remaining=Deadline.remaining())
+
+    @classmethod
+    async def _send(cls, url: str, headers: Dict[str, str]) -> Response:
+        # While Filmarks is failing, an open circuit answers at once instead of tying up a slot until the timeout.
+        if not cls.breaker.allow():
+            raise CustomException.service_unavailable()
+
+        queue_deadline = monotonic() + Config.Upstream.QUEUE_TIMEOUT
+        deadline = min(queue_deadline, Deadline.current.get() or queue_deadline)
+
+        try:
+            await cls.bucket.acquire(deadline)
+            await cls.limiter.acquire(deadline)
+
+        except BaseException as e:
+            cls.breaker.record(monotonic(), None)
+
+            if not isinstance(e, TimeoutError):
+                raise
+
+            if deadline < queue_deadline:
+                raise CustomException.gateway_timeout()
+
+            Logger.warn(f"Request to Filmarks not admitted within {Config.Upstream.QUEUE_TIMEOUT}s: '{url}'")
+
+            raise CustomException.service_unavailable()
+
+        started, overloaded, status = monotonic(), None, "cancelled"
+
+        try:
+            # Running out of the caller's budget says nothing about Filmarks, so it leaves the limiter and breaker alone.
+            resp = await Deadline.wait(cls.client.get(url=url, headers=headers))
+            overloaded, status = resp.status_code == 429 or resp.status_code >= 500, str(resp.status_code)
+
+        except HTTPError:
+            overloaded, status = True, "error"
+
+            raise
+
+        except HTTPException:
+            status = "timeout"
+
+            raise
+
+        finally:
+            cls.limiter.release(started, overloaded)
+            cls.breaker.record(started, overloaded)
+            Metrics.upstream.inc(status)
+            Metrics.observe("fetch", monotonic() - started)
+
+        if overloaded:
+            Logger.err(f"Request to Filmarks failed with status {resp.status_code}: '{url}'")
+
+            raise CustomException.service_unavailable()
+
+        cls.hedger.record(monotonic() - started)
+
+        return resp
@@ -1,21 +1,25 @@
-from bs4 import BeautifulSoup
 from datetime import datetime, timezone
 from src.scrape.base_scraper import BaseScraper
+from src.scrape.parser import Node
 from src.utility.lib import Logger, MsgSpecJSONResponse
-from src.utility.models import DataClip, DataMark, Filmarks
+from src.utility.models import DataClip, DataMark, DramaInfo, Filmarks, PersonInfo
 from typing import Any, List, Dict, Tuple
 
 
 class InfoDramaScraper(BaseScraper):
-    def __init__(self, soup: BeautifulSoup, params: Dict) -> None:
+    regions = BaseScraper.regions.extend("div.p-content-detail__head", "link")
+    label_selectors = ("h3.p-content-detail__other-info-title", "h3.p-content-detail__genre-title", "h3.p-content-detail__people-list-term")
+
+    def __init__(self, soup: Node, params: Dict) -> None:
         super().__init__(soup, params)
         
-        self.detail_head = self.soup.select_one("div.p-content-detail__head")
+        self.detail_head = self.parser.select_one(self.soup, "div.p-content-detail__head")
 
         self.series_id = int(self.params.get("drama_series_id"))
         self.season_id = int(self.params.get("drama_season_id"))
 
-        self.data = {}
+        self.labels: Dict[str, Node] = {}
+        self.data: DramaInfo | None = None
 
     def get_response(self) -> Dict[str, Any]:
         return {
@@ -25,41 +29,58 @@ class InfoDramaScraper(BaseScraper):
             "scrape_date": datetime.now(timezone.utc).isoformat(sep=" ", timespec="seconds"),
         }
 
+    def extract(self) -> Dict[str, Any]:
+        self.set_info_data()
+
+        return self.get_response()
+
+    def _get_labels(self) -> Dict[str, Node]:
+        labels = {}
+
+        # One walk over the detail head, keyed by label ("公開日：", "ジャンル：", "監督", ...); the first occurrence wins.
+        for _, title_elem in self.parser.scan(self.detail_head, self.label_selectors):
+            text = self.parser.text(title_elem)
+            label, separator, _ = text.partition("：")
+
+            labels.setdefault(label + separator, title_elem)
+
+        return labels
+
     def _get_title(self) -> str:
-        return self.detail_head.select_one("h2.p-content-detail__title > span").text
+        return self.parser.text(self.parser.select_one(self.detail_head, "h2.p-content-detail__title > span"))
 
     def _get_original_title(self) -> str | None:
-        title_elem = self.detail_head.select_one("p.p-content-detail__original")
+        title_elem = self.parser.select_one(self.detail_head, "p.p-content-detail__original")
 
-        return title_elem.text if title_elem else None
+        return self.parser.text(title_elem) if title_elem is not None else None
 
     def _get_rating(self) -> float:
-        rating = self.detail_head.select_one("div.c2-rating-l__text").text
+        rating = self.parser.text(self.parser.select_one(self.detail_head, "div.c2-rating-l__text"))
 
         return float(rating) if rating != "-" else rating
 
     def _get_data_mark(self) -> DataMark:
-        data_elem = self.detail_head.select_one("div.c-content__counts > div.js-btn-mark")
+        data_elem = self.parser.select_one(self.detail_head, "div.c-content__counts > div.js-btn-mark")
 
-        return MsgSpecJSONResponse.parse(content=data_elem.attrs["data-mark"], type=DataMark)
+        return MsgSpecJSONResponse.parse(content=self.parser.attr(data_elem, "data-mark"), type=DataMark)
 
     def _get_data_clip(self) -> DataClip:
-        data_elem = self.detail_head.select_one("div.c-content__counts > div.js-btn-clip")
+        data_elem = self.parser.select_one(self.detail_head, "div.c-content__counts > div.js-btn-clip")
 
-        return MsgSpecJSONResponse.parse(content=data_elem.attrs["data-clip"], type=DataClip)
+        return MsgSpecJSONResponse.parse(content=self.parser.attr(data_elem, "data-clip"), type=DataClip)
 
     def _get_link(self) -> str:
-        return self.soup.select_one("link").attrs["href"]
+        return self.parser.attr(self.parser.select_one(self.soup, "link"), "href")
 
     def _get_poster(self) -> str | None:
-        poster_elem = self.detail_head.select_one("div.c2-poster-l > img")
+        poster_elem = self.parser.select_one(self.detail_head, "div.c2-poster-l > img")
 
-        return poster_elem.attrs["src"] if poster_elem else None
+        return self.parser.attr(poster_elem, "src") if poster_elem is not None else None
     
     def _get_production_year(self) -> Tuple[str]:
-        title_elem = self.detail_head.select_one("h2.p-content-detail__title a")
+        title_elem = self.parser.select_one(self.detail_head, "h2.p-content-detail__title a")
 
-        return Filmarks.create_filmarks_link(title_elem.attrs["href"]), title_elem.text
+        return Filmarks.create_filmarks_link(self.parser.attr(title_elem, "href")), self.parser.text(title_elem)
 
     def _get_other_info(self, type: str) -> str | None: 
         match type:
@@ -75,26 +96,33 @@ class InfoDramaScraper(BaseScraper):
             case _:
                 raise ValueError("type can only be 'release_date', 'country_of_origin', or 'playback_time'!")
 
-        title_elem = self.detail_head.find("h3", class_="p-content-detail__other-info-title", string=lambda s: s and s.startswith(string_filter))
+        title_elem = self.labels.get(string_filter)
+
+        if title_elem is None:
+            return None
 
         match type:
             case "release_date" | "playback_time":
-                return title_elem.text.split(string_filter)[1] if title_elem else None
+                return self.parser.text(title_elem).split(string_filter)[1]
 
             case "country_of_origin":
-                return title_elem.find_next("a").text if title_elem else None
+                return self.parser.text(self.parser.find_next(title_elem, "a"))
 
     def _get_synopsis(self) -> str | None:
-        title_elem = self.detail_head.select_one("#js-content-detail-synopsis")
+        title_elem = self.parser.select_one(self.detail_head, "#js-content-detail-synopsis")
 
-        return title_elem.select_one("content-detail-synopsis").get(":outline").strip('"') if title_elem else None
+        return self.parser.attr(self.parser.select_one(title_elem, "content-detail-synopsis"), ":outline").strip('"') if title_elem is not None else None
 
     def _get_genre(self) -> List[str] | None:
-        title_elem = self.detail_head.select_one("h3.p-content-detail__genre-title")
+        title_elem = self.labels.get("ジャンル：")
 
-        return [genre.text for genre in title_elem.find_next_sibling("ul").find_all("a")] if title_elem else None
+        return [
+            self.parser.text(genre)
+            for genre
+            in self.parser.find_all(self.parser.find_next_sibling(title_elem, "ul"), "a")
+        ] if title_elem is not None else None
 
-    def _get_people_list(self, type: str) -> List[Dict[str, Any]] | None:
+    def _get_people_list(self, type: str) -> List[PersonInfo] | None:
         match type:
             case "creator":
                 string_filter = "原作"
@@ -111,79 +139,57 @@ class InfoDramaScraper(BaseScraper):
             case _:
                 raise ValueError("type can only be 'creator', 'director', 'scriptwriter', or 'artist'!")
             
-        title_elem = self.detail_head.find("h3", class_="p-content-detail__people-list-term", string=string_filter)
+        title_elem = self.labels.get(string_filter)
 
         return [
             Filmarks.create_person_info(
-                name=person.find("div").text, 
-                link=person.find("a").attrs["href"]
+                name=self.parser.text(self.parser.find(person, "div")), 
+                link=self.parser.attr(self.parser.find(person, "a"), "href")
             )
             for person
-            in title_elem.find_next_sibling("ul").find_all("li")
-        ] if title_elem else None
+            in self.parser.find_all(self.parser.find_next_sibling(title_elem, "ul"), "li")
+        ] if title_elem is not None else None
 
-    def _get_cast(self) -> List[Dict[str, Any]] | None:
-        title_elem = self.detail_head.select_one("div.p-people-list__casts")
+    def _get_cast(self) -> List[PersonInfo] | None:
+        title_elem = self.parser.select_one(self.detail_head, "div.p-people-list__casts")
 
         return [
             Filmarks.create_person_info(
-                name=cast.select_one("div.c2-button-tertiary-s-multi-text__text").text,
-                link=cast.select_one("a").attrs["href"],
-                character=character.text if (character := cast.select_one("div.c2-button-tertiary-s-multi-text__subtext")) else ""
+                name=self.parser.text(self.parser.select_one(cast, "div.c2-button-tertiary-s-multi-text__text")),
+                link=self.parser.attr(self.parser.select_one(cast, "a"), "href"),
+                character=self.parser.text(character) if (character := self.parser.select_one(cast, "div.c2-button-tertiary-s-multi-text__subtext")) is not None else ""
             )
             for cast
-            in title_elem.select("h4.p-people-list__item")
-        ] if title_elem else None
+            in self.parser.select(title_elem, "h4.p-people-list__item")
+        ] if title_elem is not None else None
 
     def set_info_data(self) -> None:
-        self.data["title"] = self._get_title()
-
-        if original_title := self._get_original_title():
-            self.data["original_title"] = original_title
-
-        self.data["rating"] = self._get_rating()
+        self.labels = self._get_labels()
 
         data_mark = self._get_data_mark()
-        self.data["mark_count"] = data_mark.count
-
         data_clip = self._get_data_clip()
-        self.data["clip_count"] = data_clip.count
-
-        self.data["link"] = self._get_link()
-
-        if poster := self._get_poster():
-            self.data["poster"] = poster
-
-        self.data["production_year_series"], self.data["production_year"] = self._get_production_year()
-
-        if release_date := self._get_other_info("release_date"):
-            self.data["release_date"] = release_date  
-
-        if country_of_origin := self._get_other_info("country_of_origin"):
-            self.data["country_of_origin"] = country_of_origin
-
-        if playback_time := self._get_other_info("playback_time"):
-            self.data["playback_time"] = playback_time
-            
-        if synopsis := self._get_synopsis():
-            self.data["synopsis"] = synopsis
-
-        if genre := self._get_genre():
-            self.data["genre"] = genre
-
-        if creator := self._get_people_list("creator"):
-            self.data["creator"] = creator
-
-        if director := self._get_people_list("director"):
-            self.data["director"] = director
-
-        if scriptwriter := self._get_people_list("scriptwriter"):
-            self.data["scriptwriter"] = scriptwriter
-
-        if artist := self._get_people_list("artist"):
-            self.data["artist"] = artist
-
-        if cast := self._get_cast():
-            self.data["cast"] = cast
+        production_year_series, production_year = self._get_production_year()
+
+        self.data = DramaInfo(
+            title=self._get_title(),
+            original_title=self._get_original_title() or None,
+            rating=self._get_rating(),
+            mark_count=data_mark.count,
+            clip_count=data_clip.count,
+            link=self._get_link(),
+            poster=self._get_poster() or None,
+            production_year_series=production_year_series,
+            production_year=production_year,
+            release_date=self._get_other_info("release_date") or None,
+            country_of_origin=self._get_other_info("country_of_origin") or None,
+            playback_time=self._get_other_info("playback_time") or None,
+            synopsis=self._get_synopsis() or None,
+            genre=self._get_genre() or None,
+            creator=self._get_people_list("creator") or None,
+            director=self._get_people_list("director") or None,
+            scriptwriter=self._get_people_list("scriptwriter") or None,
+            artist=self._get_people_list("artist") or None,
+            cast=self._get_cast() or None,
+        )
 
         Logger.info(f"[Series ID: {self.series_id}, Season ID: {self.season_id}] {self.data}")
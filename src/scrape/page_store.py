@@ -0,0 +1,191 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.utility.cache import PageEntry
+from src.utility.config import Config
+from src.utility.lib import Logger
+from threading import Lock
+from time import time
+from typing import Dict
+import sqlite3
+import zlib
+
+
+class PageStore:
+    # Reads stay on the event loop, where WAL lets them proceed while another worker writes; compression, writes and
+    # eviction, which wait for the write lock, go through a single thread with its own connection.
+    connection: sqlite3.Connection | None = None
+    writer: sqlite3.Connection | None = None
+    executor: ThreadPoolExecutor | None = None
+    # Pages handed to the writer but not committed yet, so this worker reads its own writes meanwhile.
+    pending: Dict[str, PageEntry] = {}
+    lock = Lock()
+    size = 0
+
+    @classmethod
+    def open(cls, path: str = Config.Cache.DISK_PATH) -> None:
+        if cls.connection is not None or not path:
+            return
+
+        cls.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-store")
+
+        try:
+            cls.executor.submit(cls._open_writer, path).result()
+            cls.connection = sqlite3.connect(path, timeout=0.1, isolation_level=None, check_same_thread=False)
+
+        except sqlite3.Error as e:
+            Logger.err(f"Page store at '{path}' could not be opened: '{e}'")
+
+            cls.close()
+
+    @classmethod
+    def _open_writer(cls, path: str) -> None:
+        cls.writer = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+
+        # WAL lets several workers read while one writes; NORMAL skips the fsync on every commit.
+        cls.writer.execute("PRAGMA journal_mode=WAL")
+        cls.writer.execute("PRAGMA synchronous=NORMAL")
+        cls.writer.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                digest BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        cls.writer.execute("CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages (fetched_at)")
+        cls.writer.execute("DELETE FROM pages WHERE expires_at <= ?", (time(),))
+        cls.size = cls._total_size()
+
+    @classmethod
+    def close(cls) -> None:
+        if cls.executor is None:
+            return
+
+        # Pending writes are finished first, so pages fetched just before shutdown still survive the restart.
+        cls.executor.submit(cls._close_writer).result()
+        cls.executor.shutdown()
+        cls.executor = None
+
+        if cls.connection is not None:
+            cls.connection.close()
+            cls.connection = None
+
+        cls.pending.clear()
+        cls.size = 0
+
+    @classmethod
+    def _close_writer(cls) -> None:
+        if cls.writer is not None:
+            cls.writer.close()
+            cls.writer = None
+
+    @classmethod
+    def flush(cls) -> None:
+        if cls.executor is not None:
+            cls.executor.submit(lambda: None).result()
+
+    @classmethod
+    def get(cls, url: str) -> PageEntry | None:
+        if cls.connection is None:
+            return None
+
+        if (page := cls.pending.get(url)) is not None:
+            return page if page.fetched_at + Config.Cache.DISK_TTL > time() else None
+
+        try:
+            row = cls.connection.execute(
+                "SELECT body, digest, etag, last_modified, fetched_at FROM pages WHERE url = ? AND expires_at > ?",
+                (url, time()),
+            ).fetchone()
+
+        except sqlite3.Error as e:
+            Logger.warn(f"Page store read of '{url}' failed: '{e}'")
+
+            return None
+
+        if row is None:
+            return None
+
+        body, digest, etag, last_modified, fetched_at = row
+
+        return PageEntry(html=zlib.decompress(body).decode(), digest=digest, etag=etag, last_modified=last_modified, fetched_at=fetched_at)
+
+    @classmethod
+    def set(cls, url: str, page: PageEntry) -> None:
+        if cls.executor is None:
+            return
+
+        with cls.lock:
+            cls.pending[url] = page
+
+        cls.executor.submit(cls._write, url, page)
+
+    @classmethod
+    def _write(cls, url: str, page: PageEntry) -> None:
+        body = zlib.compress(page.html.encode())
+
+        try:
+            cls.writer.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, page.digest, page.etag, page.last_modified, page.fetched_at, page.fetched_at + Config.Cache.DISK_TTL, len(body)),
+            )
+            cls.size += len(body)
+
+            if cls.size > Config.Cache.DISK_MAX_BYTES:
+                cls._evict()
+
+        except sqlite3.Error as e:
+            Logger.warn(f"Page store write of '{url}' failed: '{e}'")
+
+        finally:
+            with cls.lock:
+                if cls.pending.get(url) is page:
+                    del cls.pending[url]
+
+    @classmethod
+    def touch(cls, url: str, page: PageEntry) -> None:
+        if cls.executor is None:
+            return
+
+        cls.executor.submit(cls._update, url, page.etag, page.last_modified, page.fetched_at)
+
+    @classmethod
+    def _update(cls, url: str, etag: str | None, last_modified: str | None, fetched_at: float) -> None:
+        try:
+            cls.writer.execute(
+                "UPDATE pages SET etag = ?, last_modified = ?, fetched_at = ?, expires_at = ? WHERE url = ?",
+                (etag, last_modified, fetched_at, fetched_at + Config.Cache.DISK_TTL, url),
+            )
+
+        except sqlite3.Error as e:
+            Logger.warn(f"Page store update of '{url}' failed: '{e}'")
+
+    @classmethod
+    def _evict(cls) -> None:
+        # Other workers write to the same file, so the running total is only a hint until recounted here.
+        try:
+            cls.writer.execute("DELETE FROM pages WHERE expires_at <= ?", (time(),))
+            cls.size = cls._total_size()
+
+            if cls.size > Config.Cache.DISK_MAX_BYTES:
+                (threshold,) = cls.writer.execute(
+                    """
+                    SELECT fetched_at FROM (
+                        SELECT fetched_at, SUM(size) OVER (ORDER BY fetched_at DESC) AS kept FROM pages
+                    ) WHERE kept > ? ORDER BY fetched_at DESC LIMIT 1
+                    """,
+                    (Config.Cache.DISK_MAX_BYTES,),
+                ).fetchone()
+
+                cls.writer.execute("DELETE FROM pages WHERE fetched_at <= ?", (threshold,))
+                cls.size = cls._total_size()
+
+        except sqlite3.Error as e:
+            Logger.warn(f"Page store eviction failed: '{e}'")
+
+    @classmethod
+    def _total_size(cls) -> int:
+        return cls.writer.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
@@ -0,0 +1,332 @@
+from bisect import bisect_left, bisect_right
+from bs4 import BeautifulSoup
+from cssselect import HTMLTranslator
+from lxml import etree
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import re
+
+Node = Any
+
+
+class Region:
+    void_tags = {"img", "input", "link", "meta"}
+    class_attr = re.compile(r"""\sclass\s*=\s*["']?[^"'>=]*$""", re.I)
+    skipped = re.compile(r"<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->", re.S | re.I)
+
+    def __init__(self, selector: str) -> None:
+        self.selector = selector
+        self.tag, _, self.class_ = selector.partition(".")
+
+        self.opening = re.compile(rf"<{self.tag}(?![\w-])", re.I)
+        self.boundaries = re.compile(rf"<(/?){self.tag}(?![\w-])", re.I)
+
+    def find(self, html: str, is_skipped: Callable[[int], bool], has_skipped: Callable[[int, int], bool]) -> Tuple[int, int] | None:
+        start = self._find_opening(html, is_skipped)
+
+        if start is None:
+            return None
+
+        if self.tag in self.void_tags:
+            return start, html.index(">", start) + 1
+
+        # Most regions hold no script, style or comment, so only re-check tag by tag when one lies inside.
+        end = self._find_closing(html, start, lambda _: False)
+
+        if end is None or has_skipped(start, end):
+            end = self._find_closing(html, start, is_skipped)
+
+        if end is None:
+            raise ValueError(f"unbalanced region '{self.selector}'")
+
+        return start, end
+
+    def _find_closing(self, html: str, start: int, is_skipped: Callable[[int], bool]) -> int | None:
+        depth = 0
+
+        for boundary in self.boundaries.finditer(html, start):
+            if is_skipped(boundary.start()):
+                continue
+
+            depth += -1 if boundary.group(1) else 1
+
+            if depth == 0:
+                return html.index(">", boundary.end()) + 1
+
+        return None
+
+    def _find_opening(self, html: str, is_skipped: Callable[[int], bool]) -> int | None:
+        if not self.class_:
+            return next((match.start() for match in self.opening.finditer(html) if not is_skipped(match.start())), None)
+
+        # A plain substring scan for the class name is far cheaper than matching every opening tag of this kind.
+        position = html.find(self.class_)
+
+        while position >= 0:
+            end = position + len(self.class_)
+            start = html.rfind("<", 0, position)
+
+            if (
+                start >= 0
+                and not self._is_name_char(html, position - 1)
+                and not self._is_name_char(html, end)
+                and html.find(">", start, position) < 0
+                and not is_skipped(start)
+                and self.opening.match(html, start)
+                and self.class_attr.search(html, start, position)
+            ):
+                return start
+
+            position = html.find(self.class_, end)
+
+        return None
+
+    @staticmethod
+    def _is_name_char(html: str, position: int) -> bool:
+        return 0 <= position < len(html) and (html[position].isalnum() or html[position] in "_-")
+
+
+class Regions:
+    def __init__(self, *selectors: str) -> None:
+        self.selectors = selectors
+        self.regions = [Region(selector) for selector in selectors]
+
+    def extend(self, *selectors: str) -> "Regions":
+        return Regions(*self.selectors, *selectors)
+
+    def slice(self, html: str) -> str:
+        skipped = [match.span() for match in Region.skipped.finditer(html)]
+        starts = [start for start, _ in skipped]
+
+        def is_skipped(position: int) -> bool:
+            idx = bisect_right(starts, position) - 1
+            return idx >= 0 and position < skipped[idx][1]
+
+        def has_skipped(start: int, end: int) -> bool:
+            return bisect_left(starts, start) < bisect_left(starts, end)
+
+        try:
+            spans = sorted(span for region in self.regions if (span := region.find(html, is_skipped, has_skipped)))
+
+        except ValueError:
+            return html
+
+        parts = []
+        end = 0
+
+        for span in spans:
+            if span[0] >= end:
+                parts.append(html[span[0]:span[1]])
+                end = span[1]
+
+        return "<html><body>" + "".join(parts) + "</body></html>"
+
+
+class SimpleSelector:
+    def __init__(self, selector: str) -> None:
+        self.selector = selector
+
+        parent, _, subject = selector.rpartition(" > ")
+        self.tag, _, self.class_ = subject.partition(".")
+        self.parent_tag, _, self.parent_class = parent.partition(".")
+
+    def matches(self, parser: "Parser", node: Node, classes: List[str]) -> bool:
+        if self.class_ and self.class_ not in classes:
+            return False
+
+        if not self.parent_tag:
+            return True
+
+        parent = parser.parent(node)
+
+        return parent is not None and parser.tag(parent) == self.parent_tag and (not self.parent_class or self.parent_class in parser.classes(parent))
+
+
+class Parser:
+    name = ""
+
+    def __init__(self) -> None:
+        self.scans: Dict[Tuple[str, ...], Dict[str, List[SimpleSelector]]] = {}
+
+    def parse(self, html: str) -> Node:
+        raise NotImplementedError
+
+    def select_one(self, node: Node, selector: str) -> Node | None:
+        raise NotImplementedError
+
+    def select(self, node: Node, selector: str) -> List[Node]:
+        raise NotImplementedError
+
+    def find(self, node: Node, tag: str) -> Node | None:
+        raise NotImplementedError
+
+    def find_all(self, node: Node, tag: str) -> List[Node]:
+        raise NotImplementedError
+
+    def find_next(self, node: Node, tag: str) -> Node | None:
+        raise NotImplementedError
+
+    def find_next_sibling(self, node: Node, tag: str) -> Node | None:
+        raise NotImplementedError
+
+    def parent(self, node: Node) -> Node | None:
+        raise NotImplementedError
+
+    def tag(self, node: Node) -> str:
+        raise NotImplementedError
+
+    def scan(self, node: Node, selectors: Tuple[str, ...]) -> Iterator[Tuple[str, Node]]:
+        # Yields (selector, node) in document order for "tag.class" / "tag.class > tag" selectors, walking the subtree once.
+        if (by_tag := self.scans.get(selectors)) is None:
+            by_tag = self.scans[selectors] = {}
+
+            for selector in map(SimpleSelector, selectors):
+                by_tag.setdefault(selector.tag, []).append(selector)
+
+        for candidate in self._scan_candidates(node, tuple(by_tag)):
+            classes = self.classes(candidate)
+
+            for selector in by_tag[self.tag(candidate)]:
+                if selector.matches(self, candidate, classes):
+                    yield selector.selector, candidate
+                    break
+
+    def _scan_candidates(self, node: Node, tags: Tuple[str, ...]) -> Iterator[Node]:
+        raise NotImplementedError
+
+    def text(self, node: Node) -> str:
+        raise NotImplementedError
+
+    def attr(self, node: Node, name: str) -> str | None:
+        raise NotImplementedError
+
+    def classes(self, node: Node) -> List[str]:
+        raise NotImplementedError
+
+    @staticmethod
+    def create(name: str) -> "Parser":
+        match name:
+            case "bs4":
+                return SoupParser()
+
+            case "lxml":
+                return LxmlParser()
+
+            case _:
+                raise ValueError("parser can only be 'bs4' or 'lxml'!")
+
+
+class SoupParser(Parser):
+    name = "bs4"
+
+    def parse(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, "lxml")
+
+    def select_one(self, node: Node, selector: str) -> Node | None:
+        return node.select_one(selector)
+
+    def select(self, node: Node, selector: str) -> List[Node]:
+        return node.select(selector)
+
+    def find(self, node: Node, tag: str) -> Node | None:
+        return node.find(tag)
+
+    def find_all(self, node: Node, tag: str) -> List[Node]:
+        return node.find_all(tag)
+
+    def find_next(self, node: Node, tag: str) -> Node | None:
+        return node.find_next(tag)
+
+    def find_next_sibling(self, node: Node, tag: str) -> Node | None:
+        return node.find_next_sibling(tag)
+
+    def parent(self, node: Node) -> Node | None:
+        return node.parent
+
+    def tag(self, node: Node) -> str:
+        return node.name
+
+    def _scan_candidates(self, node: Node, tags: Tuple[str, ...]) -> Iterator[Node]:
+        return (child for child in node.descendants if child.name in tags)
+
+    def text(self, node: Node) -> str:
+        return node.text
+
+    def attr(self, node: Node, name: str) -> str | None:
+        return node.get(name)
+
+    def classes(self, node: Node) -> List[str]:
+        return node.get("class", [])
+
+
+class LxmlParser(Parser):
+    name = "lxml"
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.parser = etree.HTMLParser()
+        self.translator = HTMLTranslator()
+        self.string = etree.XPath("string()", smart_strings=False)
+        self.xpaths: Dict[str, etree.XPath] = {}
+
+    def parse(self, html: str) -> etree._Element:
+        root = etree.fromstring(html, self.parser) if html.strip() else None
+
+        return root if root is not None else etree.fromstring("<html></html>", self.parser)
+
+    def select_one(self, node: Node, selector: str) -> Node | None:
+        matches = self._css(selector)(node)
+
+        return matches[0] if matches else None
+
+    def select(self, node: Node, selector: str) -> List[Node]:
+        return self._css(selector)(node)
+
+    def find(self, node: Node, tag: str) -> Node | None:
+        matches = self._xpath(f"descendant::{tag}[1]")(node)
+
+        return matches[0] if matches else None
+
+    def find_all(self, node: Node, tag: str) -> List[Node]:
+        return self._xpath(f"descendant::{tag}")(node)
+
+    def find_next(self, node: Node, tag: str) -> Node | None:
+        matches = self._xpath(f"(descendant::{tag} | following::{tag})[1]")(node)
+
+        return matches[0] if matches else None
+
+    def find_next_sibling(self, node: Node, tag: str) -> Node | None:
+        matches = self._xpath(f"following-sibling::{tag}[1]")(node)
+
+        return matches[0] if matches else None
+
+    def parent(self, node: Node) -> Node | None:
+        return node.getparent()
+
+    def tag(self, node: Node) -> str:
+        return node.tag
+
+    def text(self, node: Node) -> str:
+        return self.string(node)
+
+    def attr(self, node: Node, name: str) -> str | None:
+        return node.get(name)
+
+    def classes(self, node: Node) -> List[str]:
+        return (node.get("class") or "").split()
+
+    def _scan_candidates(self, node: Node, tags: Tuple[str, ...]) -> Iterator[Node]:
+        # Filtering by tag name in C leaves only a handful of candidates to match in Python.
+        return node.iterdescendants(*tags)
+
+    def _css(self, selector: str) -> etree.XPath:
+        if (xpath := self.xpaths.get(selector)) is None:
+            xpath = self.xpaths[selector] = etree.XPath(self.translator.css_to_xpath(selector, prefix="descendant::"))
+
+        return xpath
+
+    def _xpath(self, path: str) -> etree.XPath:
+        if (xpath := self.xpaths.get(path)) is None:
+            xpath = self.xpaths[path] = etree.XPath(path)
+
+        return xpath
@@ -0,0 +1,102 @@
+from asyncio import Task, create_task
+from collections import OrderedDict
+from contextvars import Context
+from itertools import islice
+from src.utility.lib import Logger
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Set
+
+
+class Prefetcher:
+    max_unused = 1000
+
+    def __init__(self, count: int, concurrency: int, queue_size: int, fetch: Callable[[Hashable], Awaitable[Any]], is_cached: Callable[[Hashable], bool], has_capacity: Callable[[], bool] = lambda: True) -> None:
+        self.count = count
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.fetch = fetch
+        self.is_cached = is_cached
+        self.has_capacity = has_capacity
+
+        self.queue: OrderedDict[Hashable, None] = OrderedDict()
+        self.inflight: Set[Hashable] = set()
+        self.workers: Set[Task] = set()
+        # Prefetched keys not requested yet; bounded so that keys nobody asks for do not accumulate.
+        self.unused: OrderedDict[Hashable, None] = OrderedDict()
+
+        self.scheduled = 0
+        self.dropped = 0
+        self.prefetched = 0
+        self.failed = 0
+        self.hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.count > 0 and self.concurrency > 0
+
+    def schedule(self, keys: Iterable[Hashable]) -> None:
+        if not self.enabled:
+            return
+
+        for key in islice(keys, self.count):
+            if key in self.queue or key in self.inflight or self.is_cached(key):
+                continue
+
+            if len(self.queue) >= self.queue_size:
+                self.dropped += 1
+                continue
+
+            self.queue[key] = None
+            self.scheduled += 1
+
+        # Few workers drain the queue, so prefetches never take more than a small share of upstream capacity.
+        while len(self.workers) < self.concurrency and len(self.workers) < len(self.queue):
+            # A fresh context, so that the request which triggered the prefetch lends it neither its deadline nor its metrics labels.
+            task = create_task(self._work(), context=Context())
+            task.add_done_callback(self.workers.discard)
+            self.workers.add(task)
+
+    def record(self, key: Hashable, hit: bool) -> None:
+        if key in self.unused:
+            del self.unused[key]
+            if hit: self.hits += 1
+
+    def clear(self) -> None:
+        self.queue.clear()
+        self.unused.clear()
+
+    def stats(self) -> Dict[str, int | float]:
+        return {
+            "scheduled": self.scheduled,
+            "dropped": self.dropped,
+            "prefetched": self.prefetched,
+            "failed": self.failed,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.prefetched if self.prefetched else 0.0,
+        }
+
+    async def _work(self) -> None:
+        while self.queue:
+            # Prefetches yield to regular requests: while upstream capacity is short, the backlog is dropped instead of queued behind them.
+            if not self.has_capacity():
+                self.dropped += len(self.queue)
+                self.queue.clear()
+                break
+
+            key, _ = self.queue.popitem(last=False)
+            self.inflight.add(key)
+
+            try:
+                await self.fetch(key)
+
+                self.prefetched += 1
+                self.unused[key] = None
+
+                while len(self.unused) > self.max_unused:
+                    self.unused.popitem(last=False)
+
+            except Exception as e:
+                self.failed += 1
+                Logger.warn(f"Prefetch of '{key}' failed: '{e}'")
+
+            finally:
+                self.inflight.discard(key)
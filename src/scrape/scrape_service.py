@@ -1,16 +1,94 @@
+from asyncio import Semaphore, as_completed, ensure_future
+from datetime import datetime, timezone
 from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from src.scrape.base_scraper import BaseScraper
+from src.scrape.drama_index import DramaIndex
+from src.scrape.extract_pool import ExtractPool
+from src.scrape.http_client import HttpClient
 from src.scrape.info_drama_scraper import InfoDramaScraper
+from src.scrape.prefetcher import Prefetcher
 from src.scrape.search_drama_scraper import SearchDramaScraper
-from src.utility.lib import CustomException, Logger
-from typing import Any, Dict
+from src.utility.cache import SWRCache, TTLCache
+from src.utility.config import Config
+from src.utility.lib import CustomException, EncodedContent, Logger, MsgSpecJSONResponse
+from src.utility.metrics import Metrics
+from src.utility.models import DramaId, DramaInfo, DramaSummary, Filmarks
+from src.utility.shared_cache import SharedSWRCache, SharedTTLCache
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Dict, Hashable, Iterable, List, Tuple
 
+if Config.Cache.SHARED_PATH:
+    info_cache = SharedTTLCache(
+        path=Config.Cache.SHARED_PATH,
+        name="info",
+        max_entries=Config.Cache.INFO_MAX_ENTRIES,
+        max_bytes=Config.Cache.INFO_MAX_BYTES,
+        ttl=Config.Cache.INFO_TTL,
+        dumps=EncodedContent.dumps,
+        loads=lambda data: EncodedContent.loads(data, keep_content=False),
+        stale_ttl=Config.Cache.INFO_STALE_TTL,
+    )
 
-def search_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) -> Dict[str, Any]:
+    list_cache = SharedSWRCache(
+        path=Config.Cache.SHARED_PATH,
+        name="list",
+        max_entries=Config.Cache.LIST_MAX_ENTRIES,
+        ttl=Config.Cache.LIST_TTL,
+        stale_ttl=Config.Cache.LIST_STALE_TTL,
+        dumps=EncodedContent.dumps,
+        loads=EncodedContent.loads,
+    )
+
+else:
+    info_cache = TTLCache(
+        max_entries=Config.Cache.INFO_MAX_ENTRIES,
+        max_bytes=Config.Cache.INFO_MAX_BYTES,
+        ttl=Config.Cache.INFO_TTL,
+        stale_ttl=Config.Cache.INFO_STALE_TTL,
+    )
+
+    list_cache = SWRCache(
+        max_entries=Config.Cache.LIST_MAX_ENTRIES,
+        ttl=Config.Cache.LIST_TTL,
+        stale_ttl=Config.Cache.LIST_STALE_TTL,
+    )
+
+drama_index = DramaIndex(max_dramas=Config.Index.MAX_DRAMAS)
+
+prefetcher = Prefetcher(
+    count=Config.Prefetch.COUNT,
+    concurrency=Config.Prefetch.CONCURRENCY,
+    queue_size=Config.Prefetch.QUEUE_SIZE,
+    fetch=lambda key: _info_scrape_drama(
+        Filmarks.Endpoints.INFO_DRAMAS.value,
+        _info_request(*key),
+        "Failed to prefetch drama information with series ID: {} and season ID: {}.".format(*key),
+    ),
+    is_cached=info_cache.contains,
+    has_capacity=lambda: HttpClient.has_capacity(Config.Prefetch.RESERVE),
+)
+
+
+async def search_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) -> Dict[str, Any]:
     try:
-        scraper = SearchDramaScraper.scrape(endpoint, req)
-        scraper.set_search_results()
+        if ExtractPool.executor is not None:
+            response = await SearchDramaScraper.scrape_in_pool(endpoint, req)
+
+        else:
+            scraper = await SearchDramaScraper.scrape(endpoint, req)
+
+            with Metrics.stage("extract"):
+                scraper.set_search_results()
+                response = scraper.get_response()
+
+        dramas = [drama for drama in response["results"]["dramas"] if isinstance(drama, DramaSummary)]
+
+        for drama in dramas:
+            drama_index.add(drama)
 
-        return scraper.get_response()
+        prefetcher.schedule((drama.series_id, drama.season_id) for drama in dramas)
+
+        return response
 
     except HTTPException:
         raise
@@ -21,12 +99,18 @@ def search_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) ->
         raise CustomException.server_error()
 
 
-def info_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) -> Dict[str, Any]:
+async def stream_search_scrape_drama(endpoint: Dict[str, str], req: Request, message: str, headers: Dict[str, str] | None = None) -> StreamingResponse:
     try:
-        scraper = InfoDramaScraper.scrape(endpoint, req)
-        scraper.set_info_data()
+        if ExtractPool.executor is not None:
+            response = await SearchDramaScraper.scrape_in_pool(endpoint, req)
+
+        else:
+            scraper = await SearchDramaScraper.scrape_stream(endpoint, req)
+            scraper.set_search_results(lazy=True)
+
+            response = scraper.get_response()
 
-        return scraper.get_response()
+        response["results"]["dramas"] = drama_index.tap(_aiter(response["results"]["dramas"]))
 
     except HTTPException:
         raise
@@ -34,4 +118,190 @@ def info_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) -> D
     except Exception:
         Logger.exception(message)
 
-        raise CustomException.server_error()
\ No newline at end of file
+        raise CustomException.server_error()
+
+    return _stream_search_response(response, message, headers)
+
+
+def local_search_drama(req: Request, limit: int, page: int, message: str) -> Response:
+    query = req.query_params.get("q", "")
+    dramas = drama_index.search(query, limit=limit, page=page)
+
+    response = {
+        "query": query,
+        "results": {"dramas": dramas},
+        "heading": f"{query}の検索結果" if dramas else "",
+        "scrape_date": datetime.now(timezone.utc).isoformat(sep=" ", timespec="seconds"),
+    }
+
+    if is_stream_requested(req):
+        return _stream_search_response(response, message)
+
+    return MsgSpecJSONResponse(content=response)
+
+
+async def list_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) -> Response:
+    key = (req.url.path, tuple(sorted((k, v) for k, v in req.query_params.multi_items() if k not in BaseScraper.local_params)))
+
+    if is_stream_requested(req):
+        if (cached := list_cache.peek(key)) is not None:
+            encoded, cache = cached
+
+            return _stream_search_response(encoded.content, message, {"X-Cache": cache})
+
+        try:
+            return await stream_search_scrape_drama(endpoint, req, message, {"X-Cache": "MISS"})
+
+        except HTTPException as e:
+            encoded, headers = _fallback(list_cache, key, e)
+
+            return _stream_search_response(encoded.content, message, headers)
+
+    try:
+        encoded, cache = await list_cache.get(
+            key,
+            lambda: _encode(search_scrape_drama(endpoint, req, message)),
+        )
+        headers = {"X-Cache": cache}
+
+    except HTTPException as e:
+        encoded, headers = _fallback(list_cache, key, e)
+
+    return MsgSpecJSONResponse.encoded(encoded, req, headers=headers)
+
+
+async def info_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) -> Response:
+    key = (int(req.path_params["drama_series_id"]), int(req.path_params["drama_season_id"]))
+    encoded, headers = await _info_scrape_drama(endpoint, req, message)
+    prefetcher.record(key, hit=headers["X-Cache"] == "HIT")
+
+    return MsgSpecJSONResponse.encoded(encoded, req, headers=headers, grow=lambda size: info_cache.grow(key, encoded, size))
+
+
+async def batch_info_scrape_drama(endpoint: Dict[str, str], dramas: List[DramaId], message: str) -> AsyncIterator[bytes]:
+    semaphore = Semaphore(Config.Scrape.BATCH_CONCURRENCY)
+
+    async def scrape(drama: DramaId) -> bytes:
+        async with semaphore:
+            try:
+                encoded, _ = await _info_scrape_drama(
+                    endpoint,
+                    _info_request(drama.series_id, drama.season_id),
+                    message.format(series_id=drama.series_id, season_id=drama.season_id),
+                )
+
+                # Splices the status into the cached body instead of encoding the response again.
+                return b'{"status":200,' + encoded.body[1:]
+
+            except HTTPException as e:
+                return MsgSpecJSONResponse.render({
+                    "status": e.status_code,
+                    "series_id": drama.series_id,
+                    "season_id": drama.season_id,
+                    "detail": e.detail,
+                })
+
+    tasks = [ensure_future(scrape(drama)) for drama in dramas]
+
+    try:
+        for task in as_completed(tasks):
+            yield await task + b"\n"
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def is_stream_requested(req: Request) -> bool:
+    # The same values pydantic reads as true for SearchParams.stream.
+    return req.query_params.get("stream", "").lower() in ("1", "on", "t", "true", "y", "yes") or "application/x-ndjson" in req.headers.get("accept", "")
+
+
+def _stream_search_response(response: Dict[str, Any], message: str, headers: Dict[str, str] | None = None) -> StreamingResponse:
+    async def lines() -> AsyncIterator[bytes]:
+        yield MsgSpecJSONResponse.render({key: value for key, value in response.items() if key != "results"}) + b"\n"
+
+        # Lazily extracted dramas are encoded and flushed one by one; a failure midway can only end the stream.
+        try:
+            async for drama in _aiter(response["results"]["dramas"]):
+                yield MsgSpecJSONResponse.render(drama) + b"\n"
+
+        except Exception:
+            Logger.exception(message)
+
+            yield MsgSpecJSONResponse.render({"status": 500, "detail": CustomException.server_error().detail}) + b"\n"
+
+    return StreamingResponse(content=lines(), media_type="application/x-ndjson", headers=headers)
+
+
+async def _aiter(items: Iterable[Any] | AsyncIterable[Any]) -> AsyncIterator[Any]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+
+    else:
+        for item in items:
+            yield item
+
+
+def _info_request(series_id: int, season_id: int) -> Request:
+    return Request({
+        "type": "http",
+        "path_params": {"drama_series_id": series_id, "drama_season_id": season_id},
+        "query_string": b"",
+    })
+
+
+async def _encode(response: Awaitable[Dict[str, Any]]) -> EncodedContent:
+    response = await response
+
+    with Metrics.stage("encode"):
+        return EncodedContent.create(response)
+
+
+def _fallback(cache: TTLCache | SWRCache, key: Hashable, e: HTTPException) -> Tuple[EncodedContent, Dict[str, str]]:
+    # While Filmarks is unavailable, the last good response is more useful than an error.
+    if e.status_code not in (503, 504) or (found := cache.fallback(key)) is None:
+        raise e
+
+    encoded, age = found
+    Logger.warn(f"Serving '{key}' from {age:.0f}s ago while Filmarks is unavailable")
+
+    return encoded, {"X-Cache": "STALE", "Age": str(int(age))}
+
+
+async def _info_scrape_drama(endpoint: Dict[str, str], req: Request, message: str) -> Tuple[EncodedContent, Dict[str, str]]:
+    key = (int(req.path_params["drama_series_id"]), int(req.path_params["drama_season_id"]))
+
+    if (cached := info_cache.get(key)) is not None:
+        return cached, {"X-Cache": "HIT"}
+
+    try:
+        if ExtractPool.executor is not None:
+            response = await InfoDramaScraper.scrape_in_pool(endpoint, req)
+
+        else:
+            scraper = await InfoDramaScraper.scrape(endpoint, req)
+
+            with Metrics.stage("extract"):
+                scraper.set_info_data()
+                response = scraper.get_response()
+
+    except HTTPException as e:
+        return _fallback(info_cache, key, e)
+
+    except Exception:
+        Logger.exception(message)
+
+        raise CustomException.server_error()
+
+    if isinstance(response["data"], DramaInfo):
+        drama_index.add_info(*key, response["data"])
+
+    # Info responses are only ever served from the encoded body, so the decoded payload is not kept alongside it.
+    with Metrics.stage("encode"):
+        encoded = EncodedContent.create(response, keep_content=False)
+
+    info_cache.set(key, encoded, size=len(encoded.body))
+
+    return encoded, {"X-Cache": "MISS"}
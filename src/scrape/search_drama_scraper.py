@@ -1,128 +1,157 @@
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+from itertools import islice
+from src.scrape.parser import Node
 from src.scrape.search_scraper import SearchScraper
 from src.utility.lib import Logger, MsgSpecJSONResponse
-from src.utility.models import DataClip, DataMark, Filmarks
-from typing import Dict, List
+from src.utility.models import DataClip, DataMark, DramaSummary, Filmarks
+from typing import Any, AsyncIterator, Dict, Iterator, List
 
 
 class SearchDramaScraper(SearchScraper):
-    def __init__(self, soup: BeautifulSoup, params: Dict) -> None:
+    cassette_selectors = (
+        "h3.p-content-cassette__title",
+        "div.c-rating__score",
+        "div.c2-poster-m > img",
+        "h4.p-content-cassette__other-info-title",
+        "h4.p-content-cassette__genre-title",
+        "h4.p-content-cassette__people-list-term",
+    )
+
+    def __init__(self, soup: Node, params: Dict) -> None:
         super().__init__(soup, params)
 
-    def _get_title(self, result: Tag) -> str:
-        return result.select_one("h3.p-content-cassette__title").text
+    def extract(self) -> Dict[str, Any]:
+        self.set_search_results()
 
-    def _get_rating(self, result: Tag) -> float:
-        rating = result.select_one("div.c-rating__score").text
+        return self.get_response()
+
+    def _get_cassette(self, result: Node) -> Dict[str, Node]:
+        cassette = {}
+
+        # One walk per cassette; the first node of each field wins, labelled headings are keyed by their text ("公開日：", "監督", ...).
+        for selector, node in self.parser.scan(result, self.cassette_selectors):
+            match selector:
+                case "h4.p-content-cassette__other-info-title" | "h4.p-content-cassette__people-list-term":
+                    cassette.setdefault(self.parser.text(node), node)
+
+                case _:
+                    cassette.setdefault(selector, node)
+
+        return cassette
+
+    def _get_title(self, cassette: Dict[str, Node]) -> str:
+        return self.parser.text(cassette.get("h3.p-content-cassette__title"))
+
+    def _get_rating(self, cassette: Dict[str, Node]) -> float:
+        rating = self.parser.text(cassette.get("div.c-rating__score"))
 
         return float(rating) if rating != "-" else rating
 
-    def _get_data_mark(self, result: Tag) -> DataMark:
-        return MsgSpecJSONResponse.parse(content=result.attrs["data-mark"], type=DataMark)
+    def _get_data_mark(self, result: Node) -> DataMark:
+        return MsgSpecJSONResponse.parse(content=self.parser.attr(result, "data-mark"), type=DataMark)
 
-    def _get_data_clip(self, result: Tag) -> DataClip:
-        return MsgSpecJSONResponse.parse(content=result.attrs["data-clip"], type=DataClip)
+    def _get_data_clip(self, result: Node) -> DataClip:
+        return MsgSpecJSONResponse.parse(content=self.parser.attr(result, "data-clip"), type=DataClip)
 
-    def _get_poster(self, result: Tag) -> str | None:
-        poster = result.select_one("div.c2-poster-m > img")
+    def _get_poster(self, cassette: Dict[str, Node]) -> str | None:
+        poster = cassette.get("div.c2-poster-m > img")
 
-        return poster.attrs["src"] if poster else None
+        return self.parser.attr(poster, "src") if poster is not None else None
     
-    def _get_other_info(self, result: Tag, type: str) -> str | None:
+    def _get_other_info(self, cassette: Dict[str, Node], type: str) -> str | None:
         match type:
             case "release_date":
-                title_elem = result.find("h4", class_="p-content-cassette__other-info-title", string="公開日：")
+                title_elem = cassette.get("公開日：")
 
             case "country_of_origin":
-                title_elem = result.find("h4", class_="p-content-cassette__other-info-title", string="製作国：")
+                title_elem = cassette.get("製作国：")
 
             case "playback_time":
-                title_elem = result.find("h4", class_="p-content-cassette__other-info-title", string="再生時間：")
+                title_elem = cassette.get("再生時間：")
 
             case _:
                 raise ValueError("type can only be 'release_date', 'country_of_origin', or 'playback_time'!")
 
+        if title_elem is None:
+            return None
+
         match type:
             case "release_date" | "playback_time":
-                return title_elem.find_next_sibling("span").text if title_elem else None
+                return self.parser.text(self.parser.find_next_sibling(title_elem, "span"))
 
             case "country_of_origin":
-                return title_elem.find_next("a").text if title_elem else None
+                return self.parser.text(self.parser.find_next(title_elem, "a"))
 
-    def _get_named_list(self, result: Tag, type: str) -> List[str] | None:
+    def _get_named_list(self, cassette: Dict[str, Node], type: str) -> List[str] | None:
         match type:
             case "genre":
-                title_elem = result.find("h4", class_="p-content-cassette__genre-title")
+                title_elem = cassette.get("h4.p-content-cassette__genre-title")
 
             case "director":
-                title_elem = result.find("h4", class_="p-content-cassette__people-list-term", string="監督")
+                title_elem = cassette.get("監督")
 
             case "scriptwriter":
-                title_elem = result.find("h4", class_="p-content-cassette__people-list-term", string="脚本")
+                title_elem = cassette.get("脚本")
 
             case "cast":
-                title_elem = result.find("h4", class_="p-content-cassette__people-list-term", string="出演者")
+                title_elem = cassette.get("出演者")
 
             case _:
                 raise ValueError("type can only be 'genre', 'director', 'scriptwriter', or 'cast'!")
 
-        return [name.text for name in title_elem.find_next_sibling("ul").find_all("a")] if title_elem else None
-
-    def set_search_results(self) -> None:
-        dramas = []
+        return [
+            self.parser.text(name)
+            for name
+            in self.parser.find_all(self.parser.find_next_sibling(title_elem, "ul"), "a")
+        ] if title_elem is not None else None
 
+    def set_search_results(self, lazy: bool = False) -> None:
         if self._is_results_empty():
-            self.search_results["dramas"] = dramas
+            self.search_results["dramas"] = []
+            self._discard(self.pending)
             return
 
-        results = self._get_results_container()
-
-        for ctr, result in enumerate(results[:int(self.results_limit)]):
-            d = {}
-
-            d["title"] = self._get_title(result)
-            d["rating"] = self._get_rating(result)
-
-            data_mark = self._get_data_mark(result)
-            d["mark_count"] = data_mark.count
-
-            data_clip = self._get_data_clip(result)
-            d["clip_count"] = data_clip.count
-            d["series_id"] = data_clip.drama_series_id
-            d["season_id"] = data_clip.drama_season_id
-
-            d["link"] = Filmarks.create_filmarks_link(Filmarks.Endpoints.INFO_DRAMAS.value["path"].format(
-                drama_series_id=data_clip.drama_series_id, 
-                drama_season_id=data_clip.drama_season_id,
-            ))
-
-            if poster := self._get_poster(result):
-                d["poster"] = poster
-
-            if release_date := self._get_other_info(result, "release_date"):
-                d["release_date"] = release_date  
-
-            if country_of_origin := self._get_other_info(result, "country_of_origin"):
-                d["country_of_origin"] = country_of_origin
-
-            if playback_time := self._get_other_info(result, "playback_time"):
-                d["playback_time"] = playback_time
+        # Lazy results come page by page as the pages arrive, extracted only as the caller consumes them.
+        self.search_results["dramas"] = self._aiter_search_results() if lazy else list(self._iter_search_results())
+        self.search_heading = self._get_heading()
 
-            if genre := self._get_named_list(result, "genre"):
-                d["genre"] = genre
+    def _iter_search_results(self) -> Iterator[DramaSummary]:
+        for ctr, result in enumerate(islice(self._iter_results(), int(self.results_limit))):
+            yield self._get_drama(ctr, result)
 
-            if director := self._get_named_list(result, "director"):
-                d["director"] = director
+    async def _aiter_search_results(self) -> AsyncIterator[DramaSummary]:
+        ctr = 0
 
-            if scriptwriter := self._get_named_list(result, "scriptwriter"):
-                d["scriptwriter"] = scriptwriter
+        async for result in self._aiter_results(int(self.results_limit)):
+            yield self._get_drama(ctr, result)
+            ctr += 1
 
-            if cast := self._get_named_list(result, "cast"):
-                d["cast"] = cast
+    def _get_drama(self, ctr: int, result: Node) -> DramaSummary:
+        cassette = self._get_cassette(result)
 
-            Logger.info(self.get_logging_result(idx=ctr + 1, text=str(d)))
-            dramas.append(d)
+        data_mark = self._get_data_mark(result)
+        data_clip = self._get_data_clip(result)
 
-        self.search_results["dramas"] = dramas
-        self.search_heading = self._get_heading()
+        d = DramaSummary(
+            title=self._get_title(cassette),
+            rating=self._get_rating(cassette),
+            mark_count=data_mark.count,
+            clip_count=data_clip.count,
+            series_id=data_clip.drama_series_id,
+            season_id=data_clip.drama_season_id,
+            link=Filmarks.create_filmarks_link(Filmarks.Endpoints.INFO_DRAMAS.value["path"].format(
+                drama_series_id=data_clip.drama_series_id,
+                drama_season_id=data_clip.drama_season_id,
+            )),
+            poster=self._get_poster(cassette) or None,
+            release_date=self._get_other_info(cassette, "release_date") or None,
+            country_of_origin=self._get_other_info(cassette, "country_of_origin") or None,
+            playback_time=self._get_other_info(cassette, "playback_time") or None,
+            genre=self._get_named_list(cassette, "genre") or None,
+            director=self._get_named_list(cassette, "director") or None,
+            scriptwriter=self._get_named_list(cassette, "scriptwriter") or None,
+            cast=self._get_named_list(cassette, "cast") or None,
+        )
+
+        Logger.info(self.get_logging_result(idx=ctr + 1, text=str(d)))
+
+        return d
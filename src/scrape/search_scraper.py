@@ -1,22 +1,110 @@
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet, Tag
+from asyncio import Future, Semaphore, ensure_future, gather
 from datetime import datetime, timezone
+from fastapi import HTTPException, Request, status
+from math import ceil
 from src.scrape.base_scraper import BaseScraper
+from src.scrape.parser import Node
+from src.utility.config import Config
 from src.utility.lib import Logger
-from typing import Any, Dict
+from itertools import islice
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Type, TypeVar
+
+T = TypeVar("T", bound="SearchScraper")
 
 
 class SearchScraper(BaseScraper):
-    def __init__(self, soup: BeautifulSoup, params: Dict) -> None:
+    regions = BaseScraper.regions.extend("div.p-contents-grid", "div.p-timeline__zero", "h1.c-heading-1")
+    # The results grid is most of a search page, so lxml parses the full page faster than the spliced regions.
+    partial_parsers = frozenset({"bs4"})
+
+    def __init__(self, soup: Node, params: Dict) -> None:
         super().__init__(soup, params)
 
         self.results_limit = self.params.get("limit", 10)
         self.page_number = self.params.get("page", 1)
         self.search_query = self.params.get("q", "")
 
+        self.pages = [soup]
+        self.pending: List[Future] = []
         self.search_results = {}
         self.search_heading = ""
 
+    @classmethod
+    async def scrape_stream(cls: Type[T], endpoint: Dict[str, str], req: Request) -> T:
+        cls._raise_if_invalid_endpoint(endpoint)
+
+        url, params = cls._locate(endpoint, req.path_params, req.query_params)
+        loads = [ensure_future(load) for load in cls._page_loads(endpoint, req, url, params, cls._load)]
+
+        # Only the first page is waited for up front; later pages keep loading while earlier ones are streamed.
+        try:
+            scraper = cls._from_pages([await loads[0]], params)
+
+        except BaseException:
+            cls._discard(loads[1:])
+            raise
+
+        scraper.pending = loads[1:]
+
+        return scraper
+
+    @classmethod
+    async def _load_pages(cls, endpoint: Dict[str, str], req: Request, url: str, params: Dict, load: Callable[[str], Awaitable[Any]]) -> List[Any]:
+        loads = [ensure_future(load) for load in cls._page_loads(endpoint, req, url, params, load)]
+
+        # gather() leaves the other pages loading when one fails, each still holding a semaphore and an upstream slot.
+        try:
+            pages = await gather(*loads)
+
+        except BaseException:
+            cls._discard(loads)
+            raise
+
+        return [page for page in pages if page is not None]
+
+    @classmethod
+    def _page_loads(cls, endpoint: Dict[str, str], req: Request, url: str, params: Dict, load: Callable[[str], Awaitable[Any]]) -> List[Awaitable[Any | None]]:
+        page_numbers = cls._get_upstream_pages(int(params.get("limit", 10)), int(params.get("page", 1)))
+
+        if len(page_numbers) == 1:
+            return [load(url)]
+
+        semaphore = Semaphore(Config.Scrape.PAGE_CONCURRENCY)
+
+        async def load_page(page_number: int) -> Any | None:
+            page_url, _ = cls._locate(endpoint, req.path_params, {**req.query_params, "page": page_number})
+
+            async with semaphore:
+                try:
+                    return await load(page_url)
+
+                except HTTPException as e:
+                    if e.status_code == status.HTTP_404_NOT_FOUND and page_number != page_numbers[0]:
+                        return None
+
+                    raise
+
+        return [load_page(number) for number in page_numbers]
+
+    @classmethod
+    def _from_pages(cls: Type[T], pages: List[Node], params: Dict) -> T:
+        scraper = cls(pages[0], params)
+        scraper.pages = pages
+
+        return scraper
+
+    @staticmethod
+    def _discard(tasks: List[Future]) -> None:
+        for task in tasks:
+            if not task.cancel() and not task.cancelled(): task.exception()
+
+    @staticmethod
+    def _get_upstream_pages(limit: int, page: int) -> List[int]:
+        span = ceil(limit / Config.Scrape.PAGE_SIZE)
+        first = (page - 1) * span + 1
+
+        return list(range(first, first + span))
+
     def get_response(self) -> Dict[str, Any]:
         return {
             "query": self.search_query,
@@ -29,19 +117,40 @@ class SearchScraper(BaseScraper):
         return f"[{idx} | Query: {self.search_query} | Page: {self.page_number}] {text}"
 
     def _is_results_empty(self) -> bool:
-        condition = self.soup.select_one("div.p-timeline__zero")
+        condition = self.parser.select_one(self.soup, "div.p-timeline__zero") is not None
         if condition: Logger.warn(self.get_logging_result(idx=0, text="一致する情報は見つかりませんでした。"))
 
         return condition
 
-    def _get_results_container(self) -> ResultSet[Tag]:
-        container = self.soup.select_one(
-          "div.p-contents-grid"
-        ).select(
-          "div.js-cassette"
-        )
+    def _iter_results(self) -> Iterator[Node]:
+        for page in self.pages:
+            yield from self._iter_page_results(page)
+
+    async def _aiter_results(self, limit: int) -> AsyncIterator[Node]:
+        try:
+            for result in islice(self._iter_results(), limit):
+                yield result
+                limit -= 1
+
+            for task in self.pending:
+                if limit <= 0:
+                    break
+
+                if (page := await task) is None:
+                    continue
+
+                self.pages.append(page)
+
+                for result in islice(self._iter_page_results(page), limit):
+                    yield result
+                    limit -= 1
+
+        finally:
+            self._discard(self.pending)
 
-        return container
+    def _iter_page_results(self, page: Node) -> Iterator[Node]:
+        if (grid := self.parser.select_one(page, "div.p-contents-grid")) is not None:
+            yield from self.parser.select(grid, "div.js-cassette")
 
     def _get_heading(self) -> str:
-        return self.soup.select_one("h1.c-heading-1").text
+        return self.parser.text(self.parser.select_one(self.soup, "h1.c-heading-1"))
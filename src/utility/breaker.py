@@ -0,0 +1,105 @@
+from collections import deque
+from src.utility.lib import Logger
+from time import monotonic
+from typing import Deque, Dict, Tuple
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: float, min_requests: int, failure_rate: float, slow_call: float, open_duration: float, probes: int) -> None:
+        self.name = name
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_duration = open_duration
+        self.probes = max(probes, 1)
+
+        self.state = "closed"
+        self.outcomes: Deque[Tuple[float, bool]] = deque()
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_opened_at = 0.0
+        self.probing = 0
+        self.succeeded = 0
+
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_requests > 0
+
+    def allow(self) -> bool:
+        if not self.enabled or self.state == "closed":
+            return True
+
+        if self.state == "open":
+            if monotonic() - self.opened_at < self.open_duration:
+                self.rejected += 1
+
+                return False
+
+            self.state, self.half_opened_at = "half-open", monotonic()
+            self.probing, self.succeeded = 0, 0
+            Logger.info(f"Circuit to {self.name} half-open, probing")
+
+        # Half-open lets a few probes through; everyone else keeps failing fast until they answer.
+        if self.probing >= self.probes:
+            self.rejected += 1
+
+            return False
+
+        self.probing += 1
+
+        return True
+
+    def record(self, started: float, failed: bool | None) -> None:
+        if not self.enabled:
+            return
+
+        now = monotonic()
+
+        # Slow calls hold worker slots just like errors do, so they count against the circuit too.
+        if failed is not None and now - started > self.slow_call:
+            failed = True
+
+        if self.state == "half-open" and started >= self.half_opened_at:
+            self.probing -= 1
+
+            if failed:
+                self._open(now)
+
+            elif failed is not None:
+                self.succeeded += 1
+
+                if self.succeeded >= self.probes:
+                    self.state = "closed"
+                    Logger.info(f"Circuit to {self.name} closed")
+
+        # Requests admitted before the circuit opened finish while it is open; their outcome is already known.
+        elif self.state == "closed" and failed is not None:
+            self.outcomes.append((now, failed))
+            self.failures += failed
+
+            while self.outcomes and self.outcomes[0][0] < now - self.window:
+                self.failures -= self.outcomes.popleft()[1]
+
+            if len(self.outcomes) >= self.min_requests and self.failures / len(self.outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def stats(self) -> Dict[str, int | float | str]:
+        return {
+            "state": self.state,
+            "requests": len(self.outcomes),
+            "failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
+
+    def _open(self, now: float) -> None:
+        self.state, self.opened_at = "open", now
+        self.outcomes.clear()
+        self.failures = 0
+        self.opens += 1
+
+        Logger.warn(f"Circuit to {self.name} open for {self.open_duration}s")
@@ -0,0 +1,274 @@
+from asyncio import Task, create_task, gather
+from collections import Counter, OrderedDict
+from contextvars import Context
+from msgspec import Struct
+from src.utility.lib import Logger
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class CacheEntry(Struct):
+    value: Any
+    size: int
+    expires_at: float
+
+
+class SWREntry(Struct):
+    value: Any
+    fresh_until: float
+    expires_at: float
+
+
+class PageEntry(Struct):
+    html: str
+    digest: bytes
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = 0.0
+    soup: Any = None
+    parser: str | None = None
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag: headers["If-None-Match"] = self.etag
+        if self.last_modified: headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class TTLCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, stale_ttl: float = 0.0) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self.entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self.entries.get(key)
+
+        now = monotonic()
+
+        if entry is None or entry.expires_at <= now:
+            # Expired entries are kept for a while as a fallback for when Filmarks is unavailable.
+            if entry is not None and entry.expires_at + self.stale_ttl <= now: self._remove(key)
+            self.misses += 1
+
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return entry.value
+
+    def contains(self, key: Hashable) -> bool:
+        entry = self.entries.get(key)
+
+        return entry is not None and entry.expires_at > monotonic()
+
+    def fallback(self, key: Hashable) -> Tuple[Any, float] | None:
+        entry = self.entries.get(key)
+        now = monotonic()
+
+        if entry is None or entry.expires_at + self.stale_ttl <= now:
+            return None
+
+        return entry.value, now - (entry.expires_at - self.ttl)
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: float | None = None) -> None:
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        if key in self.entries:
+            self._remove(key)
+
+        self.entries[key] = CacheEntry(value=value, size=size, expires_at=monotonic() + (ttl or self.ttl))
+        self.size += size
+        self._evict()
+
+    def grow(self, key: Hashable, value: Any, size: int) -> None:
+        # Counts what gets attached to a cached value after it was set, e.g. compressed variants of a response.
+        if (entry := self.entries.get(key)) is None or entry.value is not value:
+            return
+
+        entry.size += size
+        self.size += size
+        self._evict()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self) -> None:
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key)
+        self.size -= entry.size
+
+
+class SWRCache:
+    def __init__(self, max_entries: int, ttl: float, stale_ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self.entries: OrderedDict[Hashable, SWREntry] = OrderedDict()
+        self.loaders: Dict[Hashable, Loader] = {}
+        self.requests: Counter[Hashable] = Counter()
+        self.refreshing: Dict[Hashable, Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    async def get(self, key: Hashable, loader: Loader) -> Tuple[Any, str]:
+        if not self.enabled:
+            return await loader(), "MISS"
+
+        entry = self._get_entry(key)
+        now = monotonic()
+
+        if entry is not None and now < entry.expires_at:
+            self._touch(key)
+            self.loaders[key] = loader
+            self.requests[key] += 1
+
+            if now < entry.fresh_until:
+                self.hits += 1
+
+                return entry.value, "HIT"
+
+            self.stale_hits += 1
+            self.refresh(key)
+
+            return entry.value, "STALE"
+
+        self.misses += 1
+        value = await loader()
+
+        self.loaders[key] = loader
+        self.requests[key] += 1
+        self._store(key, value)
+
+        return value, "MISS"
+
+    def peek(self, key: Hashable) -> Tuple[Any, str] | None:
+        entry = self._get_entry(key)
+        now = monotonic()
+
+        if entry is None or now >= entry.expires_at:
+            return None
+
+        if now < entry.fresh_until:
+            self.hits += 1
+
+            return entry.value, "HIT"
+
+        self.stale_hits += 1
+        self.refresh(key)
+
+        return entry.value, "STALE"
+
+    def fallback(self, key: Hashable) -> Tuple[Any, float] | None:
+        # Entries past their stale window stay until evicted, so the last good value outlives an outage.
+        if (entry := self._get_entry(key)) is None:
+            return None
+
+        return entry.value, monotonic() - (entry.fresh_until - self.ttl)
+
+    def refresh(self, key: Hashable) -> Task | None:
+        if key in self.refreshing or key not in self.loaders:
+            return self.refreshing.get(key)
+
+        task = create_task(self._refresh(key), context=Context())
+        task.add_done_callback(lambda _: self.refreshing.pop(key, None))
+        self.refreshing[key] = task
+
+        return task
+
+    async def refresh_popular(self, count: int, horizon: float) -> None:
+        now = monotonic()
+        tasks = []
+
+        for key, _ in self.requests.most_common(count):
+            entry = self._get_entry(key)
+
+            if entry is not None and entry.fresh_until - now < horizon and (task := self.refresh(key)):
+                tasks.append(task)
+
+        self.requests.clear()
+
+        await gather(*tasks)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.loaders.clear()
+        self.requests.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+        }
+
+    async def _refresh(self, key: Hashable) -> None:
+        try:
+            self._store(key, await self.loaders[key]())
+            self.refreshes += 1
+
+        except Exception as e:
+            Logger.warn(f"Background refresh of '{key}' failed: '{e}'")
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if key not in self.loaders:
+            return
+
+        now = monotonic()
+        self._set_entry(key, SWREntry(value=value, fresh_until=now + self.ttl, expires_at=now + self.ttl + self.stale_ttl))
+
+    def _get_entry(self, key: Hashable) -> SWREntry | None:
+        return self.entries.get(key)
+
+    def _touch(self, key: Hashable) -> None:
+        self.entries.move_to_end(key)
+
+    def _set_entry(self, key: Hashable, entry: SWREntry) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            self.loaders.pop(evicted, None)
+            self.requests.pop(evicted, None)
@@ -0,0 +1,187 @@
+from src.utility.config import Config
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, Dict, List
+import gzip
+import zlib
+
+try:
+    import brotli
+
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+
+except ImportError:
+    zstandard = None
+
+StreamCompressor = Callable[[bytes, bool], bytes]
+
+
+class Codec:
+    name = ""
+
+    def compress(self, body: bytes) -> bytes:
+        raise NotImplementedError
+
+    def stream(self) -> StreamCompressor:
+        raise NotImplementedError
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def compress(self, body: bytes) -> bytes:
+        return gzip.compress(body, compresslevel=self.level, mtime=0)
+
+    def stream(self) -> StreamCompressor:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+        return lambda chunk, last: compressor.compress(chunk) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliCodec(Codec):
+    name = "br"
+
+    def __init__(self, quality: int = 5) -> None:
+        self.quality = quality
+
+    def compress(self, body: bytes) -> bytes:
+        return brotli.compress(body, quality=self.quality)
+
+    def stream(self) -> StreamCompressor:
+        compressor = brotli.Compressor(quality=self.quality)
+
+        return lambda chunk, last: compressor.process(chunk) + (compressor.finish() if last else compressor.flush())
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        self.level = level
+
+    # A ZstdCompressor has a single compression context that its compressobj() streams share, so each use gets its own.
+    def compress(self, body: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(body)
+
+    def stream(self) -> StreamCompressor:
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+
+        return lambda chunk, last: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH if last else zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+def create_codecs(encodings: str) -> Dict[str, Codec]:
+    available: Dict[str, Callable[[], Codec]] = {"gzip": GzipCodec}
+    if brotli is not None: available["br"] = BrotliCodec
+    if zstandard is not None: available["zstd"] = ZstdCodec
+
+    return {name: available[name]() for name in (name.strip() for name in encodings.split(",")) if name in available}
+
+
+class Compression:
+    # In order of preference when the client weighs several encodings equally.
+    codecs = create_codecs(Config.Compression.ENCODINGS)
+    media_types = ("application/json", "application/x-ndjson", "text/")
+
+    @classmethod
+    def negotiate(cls, accept_encoding: str) -> Codec | None:
+        weights: Dict[str, float] = {}
+
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.partition(";")
+            weight = 1.0
+
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+
+                if key == "q":
+                    try:
+                        weight = float(value)
+
+                    except ValueError:
+                        weight = 0.0
+
+            if name := name.strip():
+                weights[name] = weight
+
+        ranked: List[Codec] = sorted(
+            (codec for name, codec in cls.codecs.items() if weights.get(name, weights.get("*", 0.0)) > 0),
+            key=lambda codec: -weights.get(codec.name, weights.get("*", 0.0)),
+        )
+
+        return ranked[0] if ranked else None
+
+    @classmethod
+    def is_compressible(cls, media_type: str) -> bool:
+        return media_type.startswith(cls.media_types)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = Config.Compression.MINIMUM_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (codec := Compression.negotiate(Headers(scope=scope).get("accept-encoding", ""))) is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, CompressionResponder(send, codec, self.minimum_size).send)
+
+
+class CompressionResponder:
+    def __init__(self, send: Send, codec: Codec, minimum_size: int) -> None:
+        self.send_next = send
+        self.codec = codec
+        self.minimum_size = minimum_size
+
+        self.start: Message | None = None
+        self.stream: StreamCompressor | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send_next(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+
+        if self.stream is not None:
+            await self.send_next({"type": "http.response.body", "body": self.stream(body, not more_body), "more_body": more_body})
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+
+        # Responses encoded upstream (e.g. cached variants) and small or binary bodies go out untouched.
+        if "content-encoding" in headers or not Compression.is_compressible(headers.get("content-type", "")) or (not more_body and len(body) < self.minimum_size):
+            self.passthrough = True
+
+            await self.send_next(self.start)
+            await self.send_next(message)
+            return
+
+        headers["Content-Encoding"] = self.codec.name
+        headers.add_vary_header("Accept-Encoding")
+
+        if more_body:
+            # Each chunk is flushed as it arrives, so streamed NDJSON keeps reaching the client line by line.
+            self.stream = self.codec.stream()
+            body = self.stream(body, False)
+            del headers["Content-Length"]
+
+        else:
+            body = self.codec.compress(body)
+            headers["Content-Length"] = str(len(body))
+
+        await self.send_next(self.start)
+        await self.send_next({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -0,0 +1,103 @@
+from os import environ
+
+
+def env_int(name: str, default: int) -> int:
+    return int(environ.get(name, default))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(environ.get(name, default))
+
+
+def env_bool(name: str, default: bool) -> bool:
+    return environ.get(name, str(int(default))).strip().lower() in ("1", "true", "yes", "on")
+
+
+class Config:
+    class Http:
+        MAX_CONNECTIONS: int = env_int("HTTP_MAX_CONNECTIONS", 100)
+        MAX_KEEPALIVE_CONNECTIONS: int = env_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+        KEEPALIVE_EXPIRY: float = env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+        TIMEOUT: float = env_float("HTTP_TIMEOUT", 10.0)
+        HTTP2: bool = env_bool("HTTP_HTTP2", True)
+
+    class Upstream:
+        RATE: float = env_float("UPSTREAM_RATE", 0.0)
+        BURST: int = env_int("UPSTREAM_BURST", 10)
+        INITIAL_CONCURRENCY: int = env_int("UPSTREAM_INITIAL_CONCURRENCY", 10)
+        MIN_CONCURRENCY: int = env_int("UPSTREAM_MIN_CONCURRENCY", 2)
+        MAX_CONCURRENCY: int = env_int("UPSTREAM_MAX_CONCURRENCY", 50)
+        LATENCY_TARGET: float = env_float("UPSTREAM_LATENCY_TARGET", 2.0)
+        QUEUE_TIMEOUT: float = env_float("UPSTREAM_QUEUE_TIMEOUT", 5.0)
+
+    class Breaker:
+        WINDOW: float = env_float("BREAKER_WINDOW", 30.0)
+        MIN_REQUESTS: int = env_int("BREAKER_MIN_REQUESTS", 20)
+        FAILURE_RATE: float = env_float("BREAKER_FAILURE_RATE", 0.5)
+        SLOW_CALL: float = env_float("BREAKER_SLOW_CALL", 5.0)
+        OPEN_DURATION: float = env_float("BREAKER_OPEN_DURATION", 15.0)
+        PROBES: int = env_int("BREAKER_PROBES", 3)
+
+    class Deadline:
+        INFO: float = env_float("DEADLINE_INFO", 10.0)
+        SEARCH: float = env_float("DEADLINE_SEARCH", 10.0)
+        LIST: float = env_float("DEADLINE_LIST", 10.0)
+        BATCH: float = env_float("DEADLINE_BATCH", 60.0)
+        MAX: float = env_float("DEADLINE_MAX", 60.0)
+
+    class Hedge:
+        PERCENT: float = env_float("HEDGE_PERCENT", 0.0)
+        QUANTILE: float = env_float("HEDGE_QUANTILE", 0.95)
+        MIN_DELAY: float = env_float("HEDGE_MIN_DELAY", 0.05)
+        MIN_SAMPLES: int = env_int("HEDGE_MIN_SAMPLES", 20)
+
+    class Scrape:
+        PARSER: str = environ.get("SCRAPE_PARSER", "bs4")
+        PARTIAL_PARSE: bool = env_bool("SCRAPE_PARTIAL_PARSE", True)
+        PAGE_SIZE: int = env_int("FILMARKS_PAGE_SIZE", 20)
+        PAGE_CONCURRENCY: int = env_int("SCRAPE_PAGE_CONCURRENCY", 5)
+        BATCH_CONCURRENCY: int = env_int("SCRAPE_BATCH_CONCURRENCY", 10)
+        WORKERS: int = env_int("SCRAPE_WORKERS", 0)
+
+    class Cache:
+        INFO_TTL: float = env_float("CACHE_INFO_TTL", 3600.0)
+        INFO_MAX_ENTRIES: int = env_int("CACHE_INFO_MAX_ENTRIES", 5000)
+        INFO_MAX_BYTES: int = env_int("CACHE_INFO_MAX_BYTES", 64 * 1024 * 1024)
+        INFO_STALE_TTL: float = env_float("CACHE_INFO_STALE_TTL", 86400.0)
+
+        LIST_TTL: float = env_float("CACHE_LIST_TTL", 300.0)
+        LIST_STALE_TTL: float = env_float("CACHE_LIST_STALE_TTL", 3600.0)
+        LIST_MAX_ENTRIES: int = env_int("CACHE_LIST_MAX_ENTRIES", 1000)
+        LIST_REFRESH_COUNT: int = env_int("CACHE_LIST_REFRESH_COUNT", 20)
+
+        PAGE_TTL: float = env_float("CACHE_PAGE_TTL", 86400.0)
+        PAGE_MAX_ENTRIES: int = env_int("CACHE_PAGE_MAX_ENTRIES", 2000)
+        PAGE_MAX_BYTES: int = env_int("CACHE_PAGE_MAX_BYTES", 256 * 1024 * 1024)
+        # With a disk store, pages fetched shortly before a restart are trusted as they are instead of being asked for again.
+        PAGE_FRESH_TTL: float = env_float("CACHE_PAGE_FRESH_TTL", 300.0 if environ.get("CACHE_DISK_PATH") else 0.0)
+
+        SHARED_PATH: str = environ.get("CACHE_SHARED_PATH", "")
+
+        DISK_PATH: str = environ.get("CACHE_DISK_PATH", "")
+        DISK_TTL: float = env_float("CACHE_DISK_TTL", 7 * 86400.0)
+        DISK_MAX_BYTES: int = env_int("CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)
+
+    class Prefetch:
+        COUNT: int = env_int("PREFETCH_COUNT", 0)
+        CONCURRENCY: int = env_int("PREFETCH_CONCURRENCY", 2)
+        QUEUE_SIZE: int = env_int("PREFETCH_QUEUE_SIZE", 100)
+        RESERVE: float = env_float("PREFETCH_RESERVE", 0.25)
+
+    class Index:
+        MAX_DRAMAS: int = env_int("INDEX_MAX_DRAMAS", 50000)
+
+    class Profile:
+        TOKEN: str = environ.get("PROFILE_TOKEN", "")
+        SAMPLE_RATE: int = env_int("PROFILE_SAMPLE_RATE", 0)
+        SLOW_THRESHOLD: float = env_float("PROFILE_SLOW_THRESHOLD", 1.0)
+        KEEP: int = env_int("PROFILE_KEEP", 20)
+        TOP: int = env_int("PROFILE_TOP", 40)
+
+    class Compression:
+        ENCODINGS: str = environ.get("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+        MINIMUM_SIZE: int = env_int("COMPRESSION_MINIMUM_SIZE", 1024)
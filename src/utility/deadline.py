@@ -0,0 +1,77 @@
+from asyncio import wait_for
+from contextvars import Context, ContextVar, copy_context
+from src.utility.config import Config
+from src.utility.lib import CustomException
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from time import monotonic
+from typing import Awaitable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class Deadline:
+    current: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+    @classmethod
+    def remaining(cls) -> float | None:
+        deadline = cls.current.get()
+
+        return None if deadline is None else deadline - monotonic()
+
+    @classmethod
+    def detached(cls) -> Context:
+        # For tasks shared by several requests or outliving one; each caller applies its own deadline while waiting.
+        context = copy_context()
+        context.run(cls.current.set, None)
+
+        return context
+
+    @classmethod
+    async def wait(cls, awaitable: Awaitable[T]) -> T:
+        if (remaining := cls.remaining()) is None:
+            return await awaitable
+
+        try:
+            return await wait_for(awaitable, timeout=max(remaining, 0))
+
+        except TimeoutError:
+            raise CustomException.gateway_timeout()
+
+
+class DeadlineMiddleware:
+    # Longest prefix first; a budget of 0 leaves the route without a deadline.
+    budgets: Tuple[Tuple[str, float], ...] = (
+        ("/dramas/batch", Config.Deadline.BATCH),
+        ("/dramas/", Config.Deadline.INFO),
+        ("/list-drama/", Config.Deadline.LIST),
+        ("/search/", Config.Deadline.SEARCH),
+    )
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (budget := self.budget(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        # Everything awaited for this request, down to the fetch from Filmarks, sees the same deadline.
+        token = Deadline.current.set(monotonic() + budget)
+
+        try:
+            await self.app(scope, receive, send)
+
+        finally:
+            Deadline.current.reset(token)
+
+    def budget(self, scope: Scope) -> float:
+        budget = next((budget for prefix, budget in self.budgets if scope["path"].startswith(prefix)), 0.0)
+
+        try:
+            requested = float(Headers(scope=scope).get("x-request-timeout", ""))
+
+        except ValueError:
+            return budget
+
+        return min(requested, Config.Deadline.MAX) if requested > 0 else budget
@@ -0,0 +1,95 @@
+from asyncio import FIRST_COMPLETED, Task, create_task, wait
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class Hedger:
+    samples = 256
+    max_budget = 10.0
+
+    def __init__(self, percent: float, quantile: float, min_delay: float, min_samples: int) -> None:
+        self.percent = percent
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+
+        self.latencies: Deque[float] = deque(maxlen=self.samples)
+        self.cached_delay: float | None = None
+        self.recorded = 0
+        self.budget = 0.0
+
+        self.requests = 0
+        self.hedged = 0
+        self.wins = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.percent > 0
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.recorded += 1
+
+        # Re-sorting the window on every response is wasted work; every few samples keeps the estimate current.
+        if self.recorded % 16 == 0:
+            self.cached_delay = None
+
+    def delay(self) -> float | None:
+        if len(self.latencies) < max(self.min_samples, 1):
+            return None
+
+        if self.cached_delay is None:
+            ordered = sorted(self.latencies)
+            self.cached_delay = max(self.min_delay, ordered[min(int(len(ordered) * self.quantile), len(ordered) - 1)])
+
+        return self.cached_delay
+
+    async def run(self, attempt: Callable[[], Awaitable[T]], remaining: float | None = None) -> T:
+        if not self.enabled:
+            return await attempt()
+
+        # Every request earns a fraction of a hedge, which caps hedges at that share of traffic even during a slowdown.
+        self.requests += 1
+        self.budget = min(self.max_budget, self.budget + self.percent / 100)
+
+        first = create_task(attempt())
+        done: Set[Task] = set()
+        pending: Set[Task] = {first}
+        error: BaseException | None = None
+
+        try:
+            if (delay := self.delay()) is not None and (remaining is None or delay < remaining):
+                done, pending = await wait(pending, timeout=delay)
+
+                if pending and self.budget >= 1:
+                    self.budget -= 1
+                    self.hedged += 1
+                    pending.add(create_task(attempt()))
+
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first: self.wins += 1
+
+                        return task.result()
+
+                    error = error or task.exception()
+
+                if not pending:
+                    raise error
+
+                done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, int | float | None]:
+        return {
+            "delay": self.delay(),
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "wins": self.wins,
+        }
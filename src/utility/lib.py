@@ -1,6 +1,10 @@
-from fastapi import HTTPException, status
-from fastapi.responses import JSONResponse
-from typing import Any
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
+from hashlib import blake2b
+from msgspec import Struct
+from src.utility.compression import Compression
+from src.utility.config import Config
+from typing import Any, Callable, Dict, Tuple
 import logging
 import msgspec
 
@@ -27,6 +31,13 @@ class CustomException:
             detail=detail,
         )
 
+    @staticmethod
+    def gateway_timeout(detail: str = "The request could not be completed in time.") -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=detail,
+        )
+
 
 class Logger:
     formatter = logging.Formatter(
@@ -59,11 +70,69 @@ class Logger:
         cls.logger.exception(message)
 
 
+class EncodedContent(Struct, gc=False):
+    content: Any
+    body: bytes
+    etag: str
+    variants: Dict[str, bytes] = {}
+
+    @classmethod
+    def create(cls, content: Dict[str, Any], volatile: frozenset[str] = frozenset({"scrape_date"}), keep_content: bool = True) -> "EncodedContent":
+        # Volatile keys change on every scrape without the content changing, so they are left out of the hash.
+        stable = msgspec.json.encode({key: value for key, value in content.items() if key not in volatile})
+
+        return cls(
+            content=content if keep_content else None,
+            body=msgspec.json.encode(content),
+            etag=f'W/"{blake2b(stable, digest_size=16).hexdigest()}"',
+        )
+
+    def dumps(self) -> bytes:
+        return msgspec.msgpack.encode((self.body, self.etag))
+
+    @classmethod
+    def loads(cls, data: bytes, keep_content: bool = True) -> "EncodedContent":
+        body, etag = msgspec.msgpack.decode(data, type=Tuple[bytes, str])
+
+        return cls(content=msgspec.json.decode(body) if keep_content else None, body=body, etag=etag)
+
+
 class MsgSpecJSONResponse(JSONResponse):
     @staticmethod
     def render(content: Any) -> bytes:
         return msgspec.json.encode(content)
 
+    @classmethod
+    def encoded(cls, encoded: EncodedContent, req: Request, headers: Dict[str, str] | None = None, grow: Callable[[int], None] | None = None) -> Response:
+        headers = {**(headers or {}), "ETag": encoded.etag}
+
+        if cls.is_not_modified(encoded.etag, req.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        headers["Vary"] = "Accept-Encoding"
+        codec = Compression.negotiate(req.headers.get("accept-encoding", ""))
+
+        if codec is None or len(encoded.body) < Config.Compression.MINIMUM_SIZE:
+            return Response(content=encoded.body, media_type=cls.media_type, headers=headers)
+
+        # Hot responses are compressed once per encoding and then served from the cache entry.
+        if (body := encoded.variants.get(codec.name)) is None:
+            body = encoded.variants[codec.name] = codec.compress(encoded.body)
+            if grow is not None: grow(len(body))
+
+        return Response(content=body, media_type=cls.media_type, headers={**headers, "Content-Encoding": codec.name})
+
+    @staticmethod
+    def is_not_modified(etag: str, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+
+        if if_none_match.strip() == "*":
+            return True
+
+        # If-None-Match uses the weak comparison, so W/ prefixes on either side are ignored.
+        return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
     @staticmethod
     def parse(content: Any, type: Any) -> Any:
         return msgspec.json.decode(content, type=type)
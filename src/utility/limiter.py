@@ -0,0 +1,159 @@
+from asyncio import Future, get_running_loop, sleep, wait_for
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+
+        self.tokens = float(self.burst)
+        self.updated = monotonic()
+        self.throttled = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self, deadline: float) -> None:
+        if not self.enabled:
+            return
+
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # Tokens are reserved up front, so callers are served in arrival order without polling.
+        wait = (1 - self.tokens) / self.rate
+
+        if now + wait > deadline:
+            self.rejected += 1
+
+            raise TimeoutError
+
+        self.tokens -= 1
+
+        if wait <= 0:
+            return
+
+        self.throttled += 1
+
+        try:
+            await sleep(wait)
+
+        except BaseException:
+            self.tokens += 1
+
+            raise
+
+    def spare(self, reserve: float) -> bool:
+        # Whether a token can be taken now and still leave `reserve` of the burst to whoever comes next.
+        tokens = min(self.burst, self.tokens + (monotonic() - self.updated) * self.rate)
+
+        return not self.enabled or tokens >= 1 + int(self.burst * reserve)
+
+    def stats(self) -> Dict[str, int | float]:
+        return {
+            "rate": self.rate,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+        }
+
+
+class AdaptiveLimiter:
+    # Multiplicative decrease on overload, additive increase of about one slot per window of healthy responses.
+    backoff = 0.7
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target: float) -> None:
+        self.minimum = max(minimum, 1)
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.limit = float(min(max(initial, self.minimum), maximum)) if maximum > 0 else 0.0
+
+        self.in_flight = 0
+        self.waiters: Deque[Future] = deque()
+        self.decreased_at = 0.0
+
+        self.increases = 0
+        self.decreases = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maximum > 0
+
+    async def acquire(self, deadline: float) -> None:
+        if not self.enabled or (not self.waiters and self.in_flight < int(self.limit)):
+            self.in_flight += 1
+
+            return
+
+        waiter = get_running_loop().create_future()
+        self.waiters.append(waiter)
+
+        try:
+            await wait_for(waiter, timeout=max(deadline - monotonic(), 0))
+
+        except BaseException as e:
+            # The slot may have been handed over just as the wait ran out; pass it on rather than leak it.
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+            if isinstance(e, TimeoutError):
+                self.rejected += 1
+
+            raise
+
+    def spare(self, reserve: float) -> bool:
+        # Whether a request can start now without queueing and still leave `reserve` of the window free.
+        return not self.enabled or (not self.waiters and self.in_flight < int(self.limit * (1 - reserve)))
+
+    def release(self, started: float, overloaded: bool | None) -> None:
+        saturated = bool(self.waiters) or self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+
+        if not self.enabled or overloaded is None:
+            self._wake()
+
+            return
+
+        if overloaded or monotonic() - started > self.latency_target:
+            # Responses to requests sent before the last decrease reflect the old window, so they do not shrink it again.
+            if started >= self.decreased_at:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self.decreased_at = monotonic()
+                self.decreases += 1
+
+        # Only a window that is actually in use proves upstream can take more.
+        elif saturated and self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.increases += 1
+
+        self._wake()
+
+    def stats(self) -> Dict[str, int | float]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "rejected": self.rejected,
+        }
+
+    def _wake(self) -> None:
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+
+            if waiter.done():
+                continue
+
+            self.in_flight += 1
+            waiter.set_result(None)
@@ -0,0 +1,171 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+Labels = Tuple[str, ...]
+Stats = Callable[[], Dict[str, Any]]
+
+
+def format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Histogram:
+    buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, help: str, labels: Labels) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+        # Per-bucket counts plus an overflow bucket; made cumulative only when rendered, so observing stays a few operations.
+        self.series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if (series := self.series.get(labels)) is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+
+        for labels, series in self.series.items():
+            count = 0
+
+            for bound, observed in zip((*self.buckets, "+Inf"), series):
+                count += observed
+                yield f"{self.name}_bucket{format_labels((*self.labels, 'le'), (*labels, str(bound)))} {count}"
+
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {series[-1]}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {count}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Labels) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+        self.series: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+
+        for labels, value in self.series.items():
+            yield f"{self.name}{format_labels(self.labels, labels)} {value}"
+
+
+class Metrics:
+    prefix = "markuapi"
+    scope: ContextVar[Scope | None] = ContextVar("scope", default=None)
+    in_flight = 0
+
+    requests = Histogram(f"{prefix}_request_duration_seconds", "Time to answer a request, including streamed bodies.", ("endpoint", "method", "status"))
+    stages = Histogram(f"{prefix}_stage_duration_seconds", "Time spent per stage of a request: fetch, parse, extract and encode.", ("endpoint", "stage"))
+    upstream = Counter(f"{prefix}_upstream_responses_total", "Responses from Filmarks by status code.", ("status",))
+
+    # Components that already count what they do are read when scraped instead of on every request.
+    collectors: Dict[str, Tuple[str, Dict[str, Stats], frozenset[str]]] = {}
+
+    @classmethod
+    def endpoint(cls, scope: Scope | None = None) -> str:
+        if (scope := scope or cls.scope.get()) is None:
+            return "background"
+
+        # Route templates rather than raw paths, so that drama IDs do not multiply the series.
+        return route.path if (route := scope.get("route")) is not None else "unmatched"
+
+    @classmethod
+    def observe(cls, stage: str, seconds: float) -> None:
+        cls.stages.observe(seconds, cls.endpoint(), stage)
+
+    @classmethod
+    @contextmanager
+    def stage(cls, stage: str) -> Iterator[None]:
+        start = perf_counter()
+
+        try:
+            yield
+
+        finally:
+            cls.observe(stage, perf_counter() - start)
+
+    @classmethod
+    def collect(cls, name: str, label: str, sources: Dict[str, Stats], counters: frozenset[str]) -> None:
+        cls.collectors[name] = (label, sources, counters)
+
+    @classmethod
+    def render(cls) -> str:
+        lines = [
+            *cls.requests.render(),
+            *cls.stages.render(),
+            *cls.upstream.render(),
+            f"# TYPE {cls.prefix}_requests_in_flight gauge",
+            f"{cls.prefix}_requests_in_flight {cls.in_flight}",
+        ]
+
+        for name, (label, sources, counters) in cls.collectors.items():
+            series: Dict[str, List[str]] = {}
+
+            for source, stats in sources.items():
+                for key, value in stats().items():
+                    if isinstance(value, str):
+                        series.setdefault(f"{cls.prefix}_{name}_{key}", []).append(f"{format_labels((label, key), (source, value))} 1")
+
+                    elif value is not None:
+                        metric = f"{cls.prefix}_{name}_{key}" + ("_total" if key in counters else "")
+                        series.setdefault(metric, []).append(f"{format_labels((label,), (source,))} {value}")
+
+            for metric, values in series.items():
+                lines.append(f"# TYPE {metric} {'counter' if metric.endswith('_total') else 'gauge'}")
+                lines.extend(metric + value for value in values)
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+            await send(message)
+
+        # Routing fills in scope["route"] on this same dict, so stages timed further down can label themselves with it.
+        token = Metrics.scope.set(scope)
+        Metrics.in_flight += 1
+        start = perf_counter()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+
+        finally:
+            Metrics.in_flight -= 1
+            Metrics.requests.observe(perf_counter() - start, Metrics.endpoint(scope), scope["method"], str(status))
+            Metrics.scope.reset(token)
@@ -1,7 +1,7 @@
 from enum import Enum
 from msgspec import Struct
 from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
-from typing import Dict, TypedDict, override
+from typing import Dict, List, Literal, TypedDict, override
 from urllib.parse import urljoin
 
 
@@ -17,9 +17,67 @@ class DataMark(Struct):
     count: int
 
 
+class PersonInfo(Struct, kw_only=True, omit_defaults=True, gc=False):
+    name: str
+    character: str | None = None
+    people_id: int
+    link: str
+
+
+class DramaSummary(Struct, kw_only=True, omit_defaults=True, gc=False):
+    title: str
+    rating: float | str
+    mark_count: int
+    clip_count: int
+    series_id: int
+    season_id: int
+    link: str
+    poster: str | None = None
+    release_date: str | None = None
+    country_of_origin: str | None = None
+    playback_time: str | None = None
+    genre: List[str] | None = None
+    director: List[str] | None = None
+    scriptwriter: List[str] | None = None
+    cast: List[str] | None = None
+
+
+class DramaInfo(Struct, kw_only=True, omit_defaults=True, gc=False):
+    title: str
+    original_title: str | None = None
+    rating: float | str
+    mark_count: int
+    clip_count: int
+    link: str
+    poster: str | None = None
+    production_year_series: str
+    production_year: str
+    release_date: str | None = None
+    country_of_origin: str | None = None
+    playback_time: str | None = None
+    synopsis: str | None = None
+    genre: List[str] | None = None
+    creator: List[PersonInfo] | None = None
+    director: List[PersonInfo] | None = None
+    scriptwriter: List[PersonInfo] | None = None
+    artist: List[PersonInfo] | None = None
+    cast: List[PersonInfo] | None = None
+
+
 class SearchParams(BaseModel):
     limit: int = Field(10, gt=0, le=1000)
     page: int = Field(1, gt=0, le=1000)
+    stream: bool = False
+    source: Literal["filmarks", "local"] = "filmarks"
+
+
+class DramaId(BaseModel):
+    series_id: int = Field(gt=0)
+    season_id: int = Field(gt=0)
+
+
+class BatchParams(BaseModel):
+    dramas: List[DramaId] = Field(min_length=1, max_length=1000)
 
 
 class Endpoint(TypedDict):
@@ -96,14 +154,7 @@ class Filmarks:
         return urljoin(base=Filmarks.FILMARKS_BASE, url=url)
 
     @staticmethod
-    def create_person_info(name: str, link: str, character: str = "") -> Dict[str, str]:
-        person_info = {}
-
-        person_info["name"] = name
-        if character: person_info["character"] = character
-
+    def create_person_info(name: str, link: str, character: str = "") -> PersonInfo:
         link = Filmarks.create_filmarks_link(link)
-        person_info["people_id"] = int(link.split("people/")[1])
-        person_info["link"] = link
 
-        return person_info
+        return PersonInfo(name=name, character=character or None, people_id=int(link.split("people/")[1]), link=link)
@@ -0,0 +1,110 @@
+from collections import deque
+from datetime import datetime, timezone
+from hmac import compare_digest
+from io import StringIO
+from src.utility.config import Config
+from src.utility.lib import Logger, MsgSpecJSONResponse
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from time import perf_counter
+from typing import Any, Deque, Dict
+import cProfile
+import pstats
+
+
+class Profiler:
+    active = False
+    requests = 0
+    profiles: Deque[Dict[str, Any]] = deque(maxlen=Config.Profile.KEEP)
+
+    @staticmethod
+    def authorized(headers: Headers) -> bool:
+        return bool(Config.Profile.TOKEN) and compare_digest(headers.get("x-profile-token", ""), Config.Profile.TOKEN)
+
+    @classmethod
+    def requested(cls, scope: Scope, headers: Headers) -> bool:
+        flag = QueryParams(scope["query_string"]).get("__profile") or headers.get("x-profile", "")
+
+        return flag.lower() in ("1", "true") and cls.authorized(headers)
+
+    @classmethod
+    def sampled(cls) -> bool:
+        if Config.Profile.SAMPLE_RATE <= 0:
+            return False
+
+        cls.requests += 1
+
+        return cls.requests % Config.Profile.SAMPLE_RATE == 0
+
+    @staticmethod
+    def report(profile: cProfile.Profile, scope: Scope, duration: float) -> str:
+        stream = StringIO()
+        stream.write(f"{scope['method']} {scope['path']} took {duration * 1000:.1f} ms\n")
+        # The profiler sees the whole thread, so other requests served meanwhile show up too; process pool work does not.
+        stream.write("Includes everything the event loop ran meanwhile; extraction in the process pool is not covered.\n")
+
+        pstats.Stats(profile, stream=stream).strip_dirs().sort_stats("cumulative").print_stats(Config.Profile.TOP)
+
+        return stream.getvalue()
+
+    @classmethod
+    def store(cls, scope: Scope, duration: float, report: str) -> None:
+        cls.profiles.append({
+            "method": scope["method"],
+            "path": scope["path"],
+            "duration": round(duration, 6),
+            "profiled_at": datetime.now(timezone.utc).isoformat(sep=" ", timespec="seconds"),
+            "report": report,
+        })
+
+
+class ProfileMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = Profiler.requested(scope, Headers(scope=scope))
+
+        # Only one profiler can be active per interpreter, so concurrent profiles are refused or skipped.
+        if requested and Profiler.active:
+            await MsgSpecJSONResponse(content={"detail": "Another request is being profiled."}, status_code=409)(scope, receive, send)
+            return
+
+        if not requested and (Profiler.active or not Profiler.sampled()):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profile = cProfile.Profile()
+        Profiler.active = True
+        start = perf_counter()
+        profile.enable()
+
+        try:
+            await self.app(scope, receive, discard if requested else send)
+
+        finally:
+            profile.disable()
+            Profiler.active = False
+
+        duration = perf_counter() - start
+
+        if requested:
+            headers = {"X-Profile-Status": str(status), "X-Profile-Duration": f"{duration:.6f}"}
+            await Response(content=Profiler.report(profile, scope, duration), media_type="text/plain", headers=headers)(scope, receive, send)
+
+        elif duration >= Config.Profile.SLOW_THRESHOLD:
+            Profiler.store(scope, duration, Profiler.report(profile, scope, duration))
+            Logger.warn(f"Profiled slow request {scope['method']} {scope['path']} ({duration * 1000:.1f} ms)")
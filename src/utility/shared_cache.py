@@ -0,0 +1,327 @@
+from asyncio import wrap_future
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.utility.cache import SWRCache, SWREntry, TTLCache
+from src.utility.lib import Logger
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Callable, Dict, Hashable, Tuple
+import sqlite3
+
+Dumps = Callable[[Any], bytes]
+Loads = Callable[[bytes], Any]
+
+
+class SharedStore:
+    # Eviction scans the whole cache, so it runs at most this often per worker instead of on every write.
+    evict_interval = 1.0
+
+    def __init__(self, path: str, name: str, max_entries: int, max_bytes: int, dumps: Dumps, loads: Loads) -> None:
+        self.path = path
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.dumps = dumps
+        self.loads = loads
+
+        # Reads stay on the event loop, where WAL lets them proceed while another worker writes; writes, which
+        # wait for the write lock, go through a single thread with its own connection.
+        self.connection: sqlite3.Connection | None = None
+        self.writer: sqlite3.Connection | None = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shared-cache-{name}")
+        # Values handed to the writer but not committed yet, so this worker reads its own writes meanwhile.
+        self.pending: Dict[str, Tuple[float, Any, float, float]] = {}
+        self.lock = Lock()
+        # Decoded values by row version, so repeated hits skip decoding and keep per-process state (e.g. compressed variants).
+        self.decoded: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self.evicted_at = 0.0
+        self.evictions = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            # Opened lazily, so each worker process gets its own connections to the shared file; the writer creates the tables.
+            self.executor.submit(self._writer).result()
+            self.connection = sqlite3.connect(self.path, timeout=0.1, isolation_level=None, check_same_thread=False)
+
+        return self.connection
+
+    def get(self, key: Hashable) -> Tuple[Any, float, float] | None:
+        name = repr(key)
+
+        if (pending := self.pending.get(name)) is not None:
+            _, value, fresh_until, expires_at = pending
+
+            return (value, fresh_until, expires_at) if expires_at > time() else None
+
+        try:
+            row = self.connect().execute(
+                "SELECT written_at, fresh_until, expires_at FROM entries WHERE cache = ? AND key = ? AND expires_at > ?",
+                (self.name, name, time()),
+            ).fetchone()
+
+            if row is None:
+                self.decoded.pop(name, None)
+
+                return None
+
+            written_at, fresh_until, expires_at = row
+
+            if (decoded := self.decoded.get(name)) is not None and decoded[0] == written_at:
+                self.decoded.move_to_end(name)
+
+                return decoded[1], fresh_until, expires_at
+
+            (blob,) = self.connect().execute("SELECT value FROM entries WHERE cache = ? AND key = ?", (self.name, name)).fetchone()
+
+        except (sqlite3.Error, TypeError) as e:
+            Logger.warn(f"Shared cache read of '{key}' failed: '{e}'")
+
+            return None
+
+        value = self.loads(blob)
+        self._remember(name, written_at, value)
+
+        return value, fresh_until, expires_at
+
+    def set(self, key: Hashable, value: Any, fresh_until: float, expires_at: float) -> None:
+        name, blob, written_at = repr(key), self.dumps(value), time()
+
+        with self.lock:
+            self.pending[name] = (written_at, value, fresh_until, expires_at)
+
+        self._remember(name, written_at, value)
+        self.executor.submit(self._write, key, name, blob, written_at, fresh_until, expires_at)
+
+    def claim(self, key: Hashable, duration: float) -> bool:
+        # Runs on the writer thread; the row tells the other workers that this one is refreshing the key.
+        now = time()
+
+        try:
+            return self._writer().execute(
+                """
+                INSERT INTO claims VALUES (?, ?, ?)
+                ON CONFLICT (cache, key) DO UPDATE SET claimed_until = excluded.claimed_until WHERE claims.claimed_until <= ?
+                """,
+                (self.name, repr(key), now + duration, now),
+            ).rowcount == 1
+
+        except sqlite3.Error as e:
+            Logger.warn(f"Shared cache claim of '{key}' failed: '{e}'")
+
+            return True
+
+    def release(self, key: Hashable) -> None:
+        try:
+            self._writer().execute("DELETE FROM claims WHERE cache = ? AND key = ?", (self.name, repr(key)))
+
+        except sqlite3.Error as e:
+            Logger.warn(f"Shared cache release of '{key}' failed: '{e}'")
+
+    def flush(self) -> None:
+        self.executor.submit(lambda: None).result()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.pending.clear()
+
+        self.executor.submit(lambda: self._writer().execute("DELETE FROM entries WHERE cache = ?", (self.name,))).result()
+        self.decoded.clear()
+
+    def stats(self) -> Tuple[int, int]:
+        return self.connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE cache = ?", (self.name,)).fetchone()
+
+    def _writer(self) -> sqlite3.Connection:
+        if self.writer is not None:
+            return self.writer
+
+        connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                cache TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                written_at REAL NOT NULL,
+                fresh_until REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (cache, key)
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_written_at ON entries (cache, written_at)")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS claims (
+                cache TEXT NOT NULL,
+                key TEXT NOT NULL,
+                claimed_until REAL NOT NULL,
+                PRIMARY KEY (cache, key)
+            )
+        """)
+
+        self.writer = connection
+
+        return connection
+
+    def _write(self, key: Hashable, name: str, blob: bytes, written_at: float, fresh_until: float, expires_at: float) -> None:
+        try:
+            connection = self._writer()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.name, name, blob, len(blob), written_at, fresh_until, expires_at),
+            )
+
+            if time() - self.evicted_at >= self.evict_interval:
+                self._evict(connection)
+                self.evicted_at = time()
+
+        except sqlite3.Error as e:
+            Logger.warn(f"Shared cache write of '{key}' failed: '{e}'")
+
+        finally:
+            with self.lock:
+                if (pending := self.pending.get(name)) is not None and pending[0] == written_at:
+                    del self.pending[name]
+
+    def _remember(self, name: str, written_at: float, value: Any) -> None:
+        self.decoded[name] = (written_at, value)
+        self.decoded.move_to_end(name)
+
+        while len(self.decoded) > self.max_entries:
+            self.decoded.popitem(last=False)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        now = time()
+        count, size, expired = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COUNT(*) FILTER (WHERE expires_at <= ?) FROM entries WHERE cache = ?",
+            (now, self.name),
+        ).fetchone()
+
+        # Reads do not write, so entries are evicted oldest written first rather than least recently used.
+        if expired or count > self.max_entries:
+            self.evictions += connection.execute(
+                """
+                DELETE FROM entries WHERE cache = ? AND (expires_at <= ? OR key IN (
+                    SELECT key FROM entries WHERE cache = ? ORDER BY written_at DESC LIMIT -1 OFFSET ?
+                ))
+                """,
+                (self.name, now, self.name, self.max_entries),
+            ).rowcount
+
+        if self.max_bytes and size > self.max_bytes:
+            self.evictions += connection.execute(
+                """
+                DELETE FROM entries WHERE cache = ? AND key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY written_at DESC, key) AS kept FROM entries WHERE cache = ?
+                    ) WHERE kept > ?
+                )
+                """,
+                (self.name, self.name, self.max_bytes),
+            ).rowcount
+
+
+class SharedTTLCache(TTLCache):
+    def __init__(self, path: str, name: str, max_entries: int, max_bytes: int, ttl: float, dumps: Dumps, loads: Loads, stale_ttl: float = 0.0) -> None:
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl, stale_ttl=stale_ttl)
+
+        self.store = SharedStore(path, name, max_entries, max_bytes, dumps, loads)
+
+    def get(self, key: Hashable) -> Any | None:
+        if (found := self.store.get(key)) is None or found[1] <= time():
+            self.misses += 1
+
+            return None
+
+        self.hits += 1
+
+        return found[0]
+
+    def contains(self, key: Hashable) -> bool:
+        return (found := self.store.get(key)) is not None and found[1] > time()
+
+    def fallback(self, key: Hashable) -> Tuple[Any, float] | None:
+        if (found := self.store.get(key)) is None:
+            return None
+
+        return found[0], time() - (found[1] - self.ttl)
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: float | None = None) -> None:
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        fresh_until = time() + (ttl or self.ttl)
+        self.store.set(key, value, fresh_until=fresh_until, expires_at=fresh_until + self.stale_ttl)
+
+    def grow(self, key: Hashable, value: Any, size: int) -> None:
+        # Variants only live in this process's decoded copy, never in the shared file whose bytes are budgeted.
+        pass
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        entries, size = self.store.stats()
+
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.store.evictions,
+        }
+
+
+class SharedSWRCache(SWRCache):
+    # Long enough for a refresh to finish; a worker that dies mid-refresh only holds the key this long.
+    claim_duration = 60.0
+
+    def __init__(self, path: str, name: str, max_entries: int, ttl: float, stale_ttl: float, dumps: Dumps, loads: Loads) -> None:
+        super().__init__(max_entries=max_entries, ttl=ttl, stale_ttl=stale_ttl)
+
+        self.store = SharedStore(path, name, max_entries, 0, dumps, loads)
+        self.claimed_elsewhere = 0
+
+    def clear(self) -> None:
+        super().clear()
+        self.store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**super().stats(), "entries": self.store.stats()[0], "claimed_elsewhere": self.claimed_elsewhere}
+
+    def _get_entry(self, key: Hashable) -> SWREntry | None:
+        if (found := self.store.get(key)) is None:
+            return None
+
+        # Deadlines are stored as wall-clock time, which unlike monotonic() means the same thing in every worker.
+        value, fresh_until, expires_at = found
+        offset = monotonic() - time()
+
+        return SWREntry(value=value, fresh_until=fresh_until + offset, expires_at=expires_at + offset)
+
+    def _touch(self, key: Hashable) -> None:
+        pass
+
+    async def _refresh(self, key: Hashable) -> None:
+        # Every worker sees the same stale entry, but only the one holding the claim refreshes it.
+        if not await wrap_future(self.store.executor.submit(self.store.claim, key, self.claim_duration)):
+            self.claimed_elsewhere += 1
+            return
+
+        try:
+            # Another worker may have refreshed it between the stale read and the claim.
+            if (entry := self._get_entry(key)) is None or monotonic() >= entry.fresh_until:
+                await super()._refresh(key)
+
+        finally:
+            self.store.executor.submit(self.store.release, key)
+
+    def _set_entry(self, key: Hashable, entry: SWREntry) -> None:
+        offset = time() - monotonic()
+        self.store.set(key, entry.value, fresh_until=entry.fresh_until + offset, expires_at=entry.expires_at + offset)
+
+        # Loaders and request counts stay per process; bound them like the local cache bounds its entries.
+        while len(self.loaders) > self.max_entries:
+            evicted = next(iter(self.loaders))
+            self.loaders.pop(evicted)
+            self.requests.pop(evicted, None)
@@ -0,0 +1,39 @@
+from asyncio import Task, create_task, shield
+from src.utility.deadline import Deadline
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self.calls: Dict[Hashable, Task] = {}
+
+        self.leaders = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.calls.get(key)
+
+        if task is None:
+            task = create_task(func(), context=Deadline.detached())
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.calls[key] = task
+            self.leaders += 1
+
+        else:
+            self.collapsed += 1
+
+        return await shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self.calls),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+        }
+
+    def _done(self, key: Hashable, task: Task) -> None:
+        if self.calls.get(key) is task:
+            del self.calls[key]
+
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,9 @@
+from tests.test_utils import client
+from typing import Iterator
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def lifespan() -> Iterator[None]:
+    with client:
+        yield
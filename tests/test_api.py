@@ -1,5 +1,6 @@
-from requests.exceptions import RequestException
+from httpx import ConnectError
 from src.scrape.base_scraper import BaseScraper
+from src.scrape.scrape_service import info_cache, list_cache
 from tests.test_utils import client, get_json_val
 import pytest
 
@@ -133,8 +134,8 @@ def test_scrape_error_500(mocker, test_data) -> None:
 ])
 def test_scrape_error_503(mocker, path) -> None:
     mocker.patch(
-        target="src.scrape.base_scraper.requests.Session", 
-        side_effect=RequestException("Testing - 503 Service Unavailable")
+        target="src.scrape.base_scraper.HttpClient.get", 
+        side_effect=ConnectError("Testing - 503 Service Unavailable")
     )
 
     resp = client.get(path)
@@ -142,3 +143,24 @@ def test_scrape_error_503(mocker, path) -> None:
 
     assert resp.status_code == 503
     assert get_json_val(resp_data, "$.detail") == "The service is currently unavailable."
+
+
+@pytest.mark.parametrize("test_data", [
+    ("/dramas/11358/15763", "tests/___info_drama.html", "$.data.title", "魔女ユヒ"),
+    ("/search/dramas?q=あなたの番です&limit=2", "tests/___search_dramas.html", "$.results.dramas[1].title", "あなたの番です 1"),
+    ("/list-drama/trend?limit=2", "tests/___search_dramas.html", "$.results.dramas[0].title", "あなたの番です 0"),
+])
+def test_api_fixture_response(mocker, test_data) -> None:
+    info_cache.clear()
+    list_cache.clear()
+
+    with open(file=test_data[1], mode="r", encoding="utf-8") as f:
+        mocker.patch(target="src.scrape.base_scraper.HttpClient.get", return_value=mocker.Mock(text=f.read()))
+
+    resp = client.get(test_data[0])
+
+    assert resp.status_code == 200
+    assert get_json_val(resp.json(), test_data[2]) == test_data[3]
+
+    info_cache.clear()
+    list_cache.clear()
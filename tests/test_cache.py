@@ -0,0 +1,438 @@
+from src.scrape.base_scraper import BaseScraper
+from src.scrape.page_store import PageStore
+from src.scrape.scrape_service import info_cache, list_cache
+from src.utility.cache import PageEntry, SWRCache, TTLCache
+from src.utility.lib import CustomException, EncodedContent
+from src.utility.models import Filmarks
+from src.utility.shared_cache import SharedStore, SharedSWRCache, SharedTTLCache
+from tests.test_utils import client, get_json_val
+import asyncio
+import pytest
+import threading
+import time
+import zlib
+
+
+def test_cache_lru_eviction_by_entries() -> None:
+    cache = TTLCache(max_entries=2, max_bytes=1000, ttl=60)
+    cache.set("a", 1, size=1)
+    cache.set("b", 2, size=1)
+    cache.get("a")
+    cache.set("c", 3, size=1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_cache_lru_eviction_by_bytes() -> None:
+    cache = TTLCache(max_entries=10, max_bytes=10, ttl=60)
+    cache.set("a", 1, size=6)
+    cache.set("b", 2, size=6)
+    cache.set("c", 3, size=11)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") is None
+    assert cache.size == 6
+
+
+def test_cache_grow_evicts_by_bytes() -> None:
+    cache = TTLCache(max_entries=10, max_bytes=10, ttl=60)
+    a, b = ["a"], ["b"]
+    cache.set("a", a, size=4)
+    cache.set("b", b, size=4)
+
+    cache.grow("b", ["other"], 5)
+    assert cache.size == 8
+
+    cache.grow("b", b, 5)
+    assert cache.get("a") is None
+    assert cache.get("b") is b
+    assert cache.size == 9
+
+
+def test_cache_ttl_expiry(mocker) -> None:
+    now = mocker.patch("src.utility.cache.monotonic", return_value=100.0)
+    cache = TTLCache(max_entries=10, max_bytes=1000, ttl=60)
+    cache.set("a", 1, size=1)
+    cache.set("b", 2, size=1, ttl=5)
+
+    now.return_value = 110.0
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    now.return_value = 161.0
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 1, "misses": 2, "evictions": 0}
+
+
+def test_cache_info_dramas_hit(mocker) -> None:
+    info_cache.clear()
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = {"series_id": 1, "season_id": 2, "data": {"title": "test"}, "scrape_date": ""}
+    scrape = mocker.patch(
+        target="src.scrape.info_drama_scraper.InfoDramaScraper.scrape",
+        return_value=scraper,
+    )
+
+    resp = client.get("/dramas/1/2")
+    assert resp.status_code == 200
+    assert resp.headers["X-Cache"] == "MISS"
+
+    resp = client.get("/dramas/1/2")
+    assert resp.status_code == 200
+    assert resp.headers["X-Cache"] == "HIT"
+    assert get_json_val(resp.json(), "$.data.title") == "test"
+
+    entry = info_cache.entries[(1, 2)]
+
+    assert entry.value.content is None
+    assert entry.size == len(entry.value.body)
+    assert scrape.await_count == 1
+    info_cache.clear()
+
+
+@pytest.mark.parametrize("path", [
+    "/dramas/404/404",
+])
+def test_cache_info_dramas_error_not_cached(mocker, path) -> None:
+    info_cache.clear()
+    mocker.patch(
+        target="src.scrape.info_drama_scraper.InfoDramaScraper.scrape",
+        side_effect=Exception("Testing - 500 Internal Server Error"),
+    )
+
+    for _ in range(2):
+        resp = client.get(path)
+        assert resp.status_code == 500
+
+    assert len(info_cache.entries) == 0
+
+
+def test_cache_swr_fresh_stale_expired(mocker) -> None:
+    now = mocker.patch("src.utility.cache.monotonic", return_value=100.0)
+    cache = SWRCache(max_entries=10, ttl=60, stale_ttl=60)
+    calls = []
+
+    async def loader() -> int:
+        calls.append(now.return_value)
+        return len(calls)
+
+    async def run() -> None:
+        assert await cache.get("a", loader) == (1, "MISS")
+
+        now.return_value = 150.0
+        assert await cache.get("a", loader) == (1, "HIT")
+
+        now.return_value = 170.0
+        assert await cache.get("a", loader) == (1, "STALE")
+        assert await cache.get("a", loader) == (1, "STALE")
+        await asyncio.sleep(0)
+        assert await cache.get("a", loader) == (2, "HIT")
+
+        now.return_value = 400.0
+        assert await cache.get("a", loader) == (3, "MISS")
+
+    asyncio.run(run())
+    assert calls == [100.0, 170.0, 400.0]
+
+
+def test_cache_swr_refresh_popular(mocker) -> None:
+    now = mocker.patch("src.utility.cache.monotonic", return_value=100.0)
+    cache = SWRCache(max_entries=10, ttl=60, stale_ttl=60)
+    loaders = {key: mocker.AsyncMock(return_value=key) for key in ("a", "b", "c")}
+
+    async def run() -> None:
+        for key, count in (("a", 3), ("b", 2), ("c", 1)):
+            for _ in range(count):
+                await cache.get(key, loaders[key])
+
+        now.return_value = 130.0
+        await cache.refresh_popular(count=2, horizon=60)
+
+    asyncio.run(run())
+    assert [loaders[key].await_count for key in ("a", "b", "c")] == [2, 2, 1]
+    assert len(cache.requests) == 0
+
+
+@pytest.mark.parametrize("path, target", [
+    ("/dramas/1/2", "src.scrape.info_drama_scraper.InfoDramaScraper.scrape"),
+    ("/list-drama/trend", "src.scrape.search_drama_scraper.SearchDramaScraper.scrape"),
+    ("/list-drama/trend?stream=1", "src.scrape.search_drama_scraper.SearchDramaScraper.scrape"),
+])
+@pytest.mark.parametrize("error, status", [
+    (CustomException.service_unavailable(), 200),
+    (CustomException.not_found(), 404),
+])
+def test_cache_fallback_when_unavailable(mocker, path, target, error, status) -> None:
+    info_cache.clear()
+    list_cache.clear()
+    now = mocker.patch("src.utility.cache.monotonic", return_value=100.0)
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = {"series_id": 1, "season_id": 2, "data": {"title": "test"}, "results": {"dramas": []}, "scrape_date": ""}
+    scrape = mocker.patch(target=target, side_effect=[scraper, error])
+    if "stream=1" in path: mocker.patch(target=target + "_stream", new=scrape)
+
+    assert client.get(path.replace("?stream=1", "")).headers["X-Cache"] == "MISS"
+
+    now.return_value = 4100.0
+    resp = client.get(path)
+
+    assert resp.status_code == status
+
+    if status == 200:
+        assert resp.headers["X-Cache"] == "STALE"
+        assert resp.headers["Age"] == "4000"
+
+    info_cache.clear()
+    list_cache.clear()
+
+
+def test_cache_list_dramas_hit(mocker) -> None:
+    list_cache.clear()
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = {"query": "", "results": {"dramas": []}, "heading": "test", "scrape_date": ""}
+    scrape = mocker.patch(
+        target="src.scrape.search_drama_scraper.SearchDramaScraper.scrape",
+        return_value=scraper,
+    )
+
+    resp = client.get("/list-drama/trend?limit=5")
+    assert resp.status_code == 200
+    assert resp.headers["X-Cache"] == "MISS"
+
+    resp = client.get("/list-drama/trend?limit=5")
+    assert resp.status_code == 200
+    assert resp.headers["X-Cache"] == "HIT"
+    assert get_json_val(resp.json(), "$.heading") == "test"
+
+    resp = client.get("/list-drama/trend?limit=6")
+    assert resp.headers["X-Cache"] == "MISS"
+
+    assert scrape.await_count == 2
+    list_cache.clear()
+
+
+def test_cache_list_dramas_stream(mocker) -> None:
+    list_cache.clear()
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = {"query": "", "results": {"dramas": [{"title": "a"}, {"title": "b"}]}, "heading": "test", "scrape_date": ""}
+    mocker.patch(
+        target="src.scrape.search_drama_scraper.SearchDramaScraper.scrape",
+        return_value=scraper,
+    )
+
+    resp = client.get("/list-drama/trend?limit=5")
+    assert resp.headers["X-Cache"] == "MISS"
+
+    resp = client.get("/list-drama/trend?limit=5&stream=1")
+    assert resp.status_code == 200
+    assert resp.headers["X-Cache"] == "HIT"
+    assert resp.text.splitlines() == ['{"query":"","heading":"test","scrape_date":""}', '{"title":"a"}', '{"title":"b"}']
+
+    list_cache.clear()
+
+
+def test_cache_etag_ignores_scrape_date() -> None:
+    first = EncodedContent.create({"series_id": 1, "data": {"title": "test"}, "scrape_date": "2024-01-01 00:00:00+00:00"})
+    second = EncodedContent.create({"series_id": 1, "data": {"title": "test"}, "scrape_date": "2024-01-02 00:00:00+00:00"})
+    third = EncodedContent.create({"series_id": 1, "data": {"title": "other"}, "scrape_date": "2024-01-01 00:00:00+00:00"})
+
+    assert first.etag == second.etag != third.etag
+    assert first.body != second.body
+
+
+@pytest.mark.parametrize("path, target, value", [
+    ("/dramas/1/2", "src.scrape.info_drama_scraper.InfoDramaScraper.scrape", {"series_id": 1, "season_id": 2, "data": {"title": "test"}, "scrape_date": ""}),
+    ("/list-drama/trend", "src.scrape.search_drama_scraper.SearchDramaScraper.scrape", {"query": "", "results": {"dramas": []}, "heading": "test", "scrape_date": ""}),
+])
+def test_cache_etag_not_modified(mocker, path, target, value) -> None:
+    info_cache.clear()
+    list_cache.clear()
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = value
+    mocker.patch(target=target, return_value=scraper)
+
+    resp = client.get(path)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    resp = client.get(path, headers={"If-None-Match": f'"other", {etag}'})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.headers["X-Cache"] == "HIT"
+    assert resp.content == b""
+
+    resp = client.get(path, headers={"If-None-Match": '"other"'})
+    assert resp.status_code == 200
+    assert resp.json() == value
+
+    info_cache.clear()
+    list_cache.clear()
+
+
+def test_cache_page_store_persists(mocker, tmp_path) -> None:
+    now = mocker.patch("src.scrape.page_store.time", return_value=1000.0)
+    mocker.patch("src.scrape.page_store.Config.Cache.DISK_TTL", new=60.0)
+    path = str(tmp_path / "pages.db")
+
+    PageStore.open(path)
+    PageStore.set("a", PageEntry(html="<p>a</p>", digest=b"a", etag='"a"', fetched_at=1000.0))
+    PageStore.set("b", PageEntry(html="<p>b</p>", digest=b"b", fetched_at=1030.0))
+    PageStore.close()
+
+    now.return_value = 1070.0
+    PageStore.open(path)
+
+    assert PageStore.get("a") is None
+    assert PageStore.get("b") == PageEntry(html="<p>b</p>", digest=b"b", fetched_at=1030.0)
+    PageStore.close()
+
+
+def test_cache_page_store_evicts_oldest(mocker, tmp_path) -> None:
+    mocker.patch("src.scrape.page_store.time", return_value=1000.0)
+    PageStore.open(str(tmp_path / "pages.db"))
+    pages = {key: PageEntry(html=key * 2000, digest=key.encode(), fetched_at=1000.0 + idx) for idx, key in enumerate("abcd")}
+    size = len(zlib.compress(pages["a"].html.encode()))
+    mocker.patch("src.scrape.page_store.Config.Cache.DISK_MAX_BYTES", new=size * 2)
+
+    for key, page in pages.items():
+        PageStore.set(key, page)
+
+    PageStore.flush()
+
+    assert [PageStore.get(key) is not None for key in "abcd"] == [False, False, True, True]
+    assert PageStore.size == size * 2
+    PageStore.close()
+
+
+def test_cache_page_store_writes_in_background(tmp_path) -> None:
+    PageStore.open(str(tmp_path / "pages.db"))
+    page = PageEntry(html="<p>a</p>", digest=b"a", fetched_at=time.time())
+    busy = threading.Event()
+    PageStore.executor.submit(busy.wait)
+
+    PageStore.set("a", page)
+
+    assert PageStore.get("a") is page
+    assert PageStore.connection.execute("SELECT COUNT(*) FROM pages").fetchone() == (0,)
+
+    busy.set()
+    PageStore.flush()
+
+    assert not PageStore.pending
+    assert PageStore.get("a") == page
+    PageStore.close()
+
+
+def test_cache_page_store_warm_start(mocker, tmp_path) -> None:
+    BaseScraper.pages.clear()
+    mocker.patch("src.scrape.base_scraper.Config.Cache.PAGE_FRESH_TTL", new=60.0)
+    mocker.patch("src.scrape.base_scraper.Config.Scrape.PARTIAL_PARSE", new=False)
+    http_get = mocker.patch(
+        target="src.scrape.base_scraper.HttpClient.get",
+        return_value=mocker.Mock(status_code=200, text="<p class='x'>1</p>", headers={}),
+    )
+    url = Filmarks.create_filmarks_link("/dramas/1/2")
+    PageStore.open(str(tmp_path / "pages.db"))
+
+    asyncio.run(BaseScraper._fetch(url))
+    BaseScraper.pages.clear()
+    soup = asyncio.run(BaseScraper._fetch(url))
+
+    assert http_get.await_count == 1
+    assert "<p class=\"x\">1</p>" in str(soup)
+    PageStore.close()
+    BaseScraper.pages.clear()
+
+
+def test_cache_shared_across_workers(mocker, tmp_path) -> None:
+    mocker.patch.object(target=SharedStore, attribute="evict_interval", new=0)
+    path = str(tmp_path / "shared.db")
+    workers = [
+        SharedTTLCache(path=path, name="info", max_entries=2, max_bytes=1000, ttl=60, dumps=EncodedContent.dumps, loads=EncodedContent.loads)
+        for _ in range(2)
+    ]
+    encoded = {key: EncodedContent.create({"series_id": key, "scrape_date": ""}) for key in range(3)}
+
+    workers[0].set((0, 0), encoded[0], size=len(encoded[0].body))
+    assert workers[0].get((0, 0)) is encoded[0]
+
+    workers[0].store.flush()
+    found = workers[1].get((0, 0))
+
+    assert (found.body, found.etag, found.content) == (encoded[0].body, encoded[0].etag, {"series_id": 0, "scrape_date": ""})
+    assert workers[1].get((0, 0)) is found
+
+    workers[1].set((1, 1), encoded[1], size=len(encoded[1].body))
+    workers[1].store.flush()
+    workers[0].set((2, 2), encoded[2], size=len(encoded[2].body))
+    workers[0].store.flush()
+
+    assert workers[1].get((0, 0)) is None
+    assert workers[1].stats() == {"entries": 2, "bytes": 2 * len(encoded[0].dumps()), "hits": 2, "misses": 1, "evictions": 0}
+
+
+def test_cache_shared_swr_across_workers(mocker, tmp_path) -> None:
+    path = str(tmp_path / "shared.db")
+    workers = [SharedSWRCache(path=path, name="list", max_entries=10, ttl=60, stale_ttl=60, dumps=EncodedContent.dumps, loads=EncodedContent.loads) for _ in range(2)]
+    loader = mocker.AsyncMock(return_value=EncodedContent.create({"heading": "test", "scrape_date": ""}))
+
+    async def run() -> list:
+        results = []
+
+        for worker in workers:
+            results.append((await worker.get("a", loader))[1])
+            worker.store.flush()
+
+        return results
+
+    assert asyncio.run(run()) == ["MISS", "HIT"]
+    assert loader.await_count == 1
+    assert workers[1].peek("a")[0].content == {"heading": "test", "scrape_date": ""}
+
+
+def test_cache_shared_swr_refresh_claimed_once(tmp_path) -> None:
+    path = str(tmp_path / "shared.db")
+    workers = [SharedSWRCache(path=path, name="list", max_entries=10, ttl=0.01, stale_ttl=60, dumps=EncodedContent.dumps, loads=EncodedContent.loads) for _ in range(2)]
+    loads = []
+
+    async def loader() -> EncodedContent:
+        loads.append(1)
+        await asyncio.sleep(0.05)
+
+        return EncodedContent.create({"heading": str(len(loads)), "scrape_date": ""})
+
+    async def run() -> list:
+        await workers[0].get("a", loader)
+        workers[0].store.flush()
+        await asyncio.sleep(0.02)
+
+        cached = await asyncio.gather(*(worker.get("a", loader) for worker in workers))
+        await asyncio.gather(*(task for worker in workers for task in list(worker.refreshing.values())))
+
+        return [cache for _, cache in cached]
+
+    assert asyncio.run(run()) == ["STALE", "STALE"]
+    assert len(loads) == 2
+    assert sorted((worker.refreshes, worker.claimed_elsewhere) for worker in workers) == [(0, 1), (1, 0)]
+
+
+def test_cache_shared_fallback(mocker, tmp_path) -> None:
+    now = mocker.patch("src.utility.shared_cache.time", return_value=1000.0)
+    cache = SharedTTLCache(path=str(tmp_path / "shared.db"), name="info", max_entries=10, max_bytes=1000, ttl=60, dumps=EncodedContent.dumps, loads=EncodedContent.loads, stale_ttl=60)
+    encoded = EncodedContent.create({"series_id": 1})
+    cache.set(1, encoded, size=len(encoded.body))
+    cache.store.flush()
+
+    now.return_value = 1070.0
+    assert cache.get(1) is None
+    assert not cache.contains(1)
+    assert cache.fallback(1)[0].body == encoded.body
+    assert cache.fallback(1)[1] == 70.0
+
+    now.return_value = 1130.0
+    assert cache.fallback(1) is None
@@ -0,0 +1,94 @@
+from src.scrape.scrape_service import info_cache, list_cache
+from src.utility.compression import Compression
+from tests.test_utils import client
+import brotli
+import gzip
+import pytest
+import zstandard
+
+
+@pytest.mark.parametrize("test_data", [
+    ("gzip, deflate, br, zstd", "zstd"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0.5, gzip;q=0.5", "br"),
+    ("*;q=0.1, zstd;q=0, br;q=0", "gzip"),
+    ("identity", None),
+    ("", None),
+])
+def test_compression_negotiate(test_data) -> None:
+    codec = Compression.negotiate(test_data[0])
+
+    assert (codec.name if codec else None) == test_data[1]
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compression_cached_variants(mocker, encoding) -> None:
+    info_cache.clear()
+    value = {"series_id": 1, "season_id": 2, "data": {"title": "テスト" * 1000}, "scrape_date": ""}
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = value
+    mocker.patch(target="src.scrape.info_drama_scraper.InfoDramaScraper.scrape", return_value=scraper)
+    compress = mocker.spy(Compression.codecs[encoding], "compress")
+
+    for _ in range(2):
+        resp = client.get("/dramas/1/2", headers={"Accept-Encoding": encoding})
+        assert resp.status_code == 200
+        assert resp.headers["Content-Encoding"] == encoding
+        assert "Accept-Encoding" in resp.headers["Vary"]
+        assert resp.json() == value
+
+    entry = info_cache.entries[(1, 2)]
+
+    assert compress.call_count == 1
+    assert set(entry.value.variants) == {encoding}
+    assert entry.size == info_cache.size == len(entry.value.body) + len(entry.value.variants[encoding])
+    info_cache.clear()
+
+
+@pytest.mark.parametrize("test_data", [
+    ("/", "gzip", None),
+    ("/search/dramas?q=test", "gzip", "gzip"),
+    ("/search/dramas?q=test", "identity", None),
+    ("/search/dramas?q=test&stream=1", "br", "br"),
+    ("/list-drama/trend?stream=1", "zstd", "zstd"),
+])
+def test_compression_middleware(mocker, test_data) -> None:
+    list_cache.clear()
+    dramas = [{"title": f"テスト {idx}"} for idx in range(100)]
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = {"query": "test", "results": {"dramas": dramas}, "heading": "test", "scrape_date": ""}
+    mocker.patch(target="src.scrape.search_drama_scraper.SearchDramaScraper.scrape", return_value=scraper)
+    mocker.patch(target="src.scrape.search_drama_scraper.SearchDramaScraper.scrape_stream", return_value=scraper)
+
+    resp = client.get(test_data[0], headers={"Accept-Encoding": test_data[1]})
+
+    assert resp.status_code == 200
+    assert resp.headers.get("Content-Encoding") == test_data[2]
+
+    if "stream=1" in test_data[0]:
+        assert len(resp.text.splitlines()) == 101
+
+    list_cache.clear()
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compression_concurrent_streams(encoding) -> None:
+    decompress = {
+        "gzip": gzip.decompress,
+        "br": brotli.decompress,
+        "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+    }[encoding]
+    codec = Compression.codecs[encoding]
+    chunks = [[f'{{"stream": {idx}, "line": {line}}}\n'.encode() * 50 for line in range(3)] for idx in range(2)]
+    streams = [codec.stream(), codec.stream()]
+    outputs = [b"", b""]
+    body = b"cached" * 1000
+
+    for line in range(3):
+        for idx, stream in enumerate(streams):
+            outputs[idx] += stream(chunks[idx][line], line == 2)
+
+        compressed = codec.compress(body)
+
+    assert [decompress(output) for output in outputs] == [b"".join(lines) for lines in chunks]
+    assert decompress(compressed) == body
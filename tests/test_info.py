@@ -1,7 +1,14 @@
 from random import choice
+from src.scrape.prefetcher import Prefetcher
+from src.scrape.scrape_service import info_cache, list_cache, prefetcher
+from src.utility.limiter import AdaptiveLimiter
+from src.utility.lib import CustomException
+from src.utility.models import DramaSummary
 from tests.test_utils import client, get_json_val
+import asyncio
 import json
 import pytest
+import time
 
 
 @pytest.mark.parametrize("path", [
@@ -150,3 +157,137 @@ def test_info_with_results_random() -> None:
     assert get_json_val(resp_data, "$.data.link") is not None
     assert get_json_val(resp_data, "$.data.production_year_series") is not None
     assert get_json_val(resp_data, "$.data.production_year") is not None
+
+
+def test_info_batch_streams_each_result(mocker) -> None:
+    info_cache.clear()
+
+    async def scrape(endpoint, req) -> object:
+        series_id = req.path_params["drama_series_id"]
+        if series_id == 404:
+            raise CustomException.not_found()
+
+        scraper = mocker.Mock()
+        scraper.get_response.return_value = {"series_id": series_id, "season_id": req.path_params["drama_season_id"], "data": {}}
+        return scraper
+
+    mocker.patch(target="src.scrape.info_drama_scraper.InfoDramaScraper.scrape", side_effect=scrape)
+
+    resp = client.post("/dramas/batch", json={"dramas": [
+        {"series_id": 1, "season_id": 2},
+        {"series_id": 404, "season_id": 404},
+        {"series_id": 3, "season_id": 4},
+    ]})
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    assert sorted((get_json_val(line, "$.series_id"), get_json_val(line, "$.status")) for line in lines) == [(1, 200), (3, 200), (404, 404)]
+    assert get_json_val(next(line for line in lines if line["status"] == 404), "$.detail") == "The requested resource could not be found."
+
+    info_cache.clear()
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"dramas": []},
+    {"dramas": [{"series_id": "abc", "season_id": 1}]},
+    {"dramas": [{"series_id": 1}]},
+])
+def test_info_batch_invalid_body(body) -> None:
+    resp = client.post("/dramas/batch", json=body)
+
+    assert resp.status_code == 422
+
+
+def test_info_prefetcher_queue() -> None:
+    fetched = []
+
+    async def fetch(key) -> None:
+        if key == "bad":
+            raise ValueError("Testing - prefetch failed")
+
+        fetched.append(key)
+
+    async def run() -> Prefetcher:
+        prefetcher = Prefetcher(count=3, concurrency=2, queue_size=2, fetch=fetch, is_cached=lambda key: key == "cached")
+        prefetcher.schedule(["a", "cached", "bad", "b", "c"])
+        prefetcher.schedule(["a"])
+
+        while prefetcher.workers:
+            await asyncio.sleep(0)
+
+        prefetcher.record("a", hit=True)
+        prefetcher.record("a", hit=True)
+        prefetcher.record("b", hit=False)
+
+        return prefetcher
+
+    prefetcher = asyncio.run(run())
+
+    assert fetched == ["a"]
+    assert prefetcher.stats() == {"scheduled": 2, "dropped": 0, "prefetched": 1, "failed": 1, "hits": 1, "hit_rate": 1.0}
+
+
+def test_info_prefetcher_yields_to_requests() -> None:
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=4, latency_target=1.0)
+    fetched = []
+
+    async def fetch(key) -> None:
+        fetched.append(key)
+        limiter.in_flight += 1
+
+    async def run() -> Prefetcher:
+        prefetcher = Prefetcher(count=3, concurrency=1, queue_size=3, fetch=fetch, is_cached=lambda key: False, has_capacity=lambda: limiter.spare(0.5))
+        prefetcher.schedule(["a", "b", "c"])
+
+        while prefetcher.workers:
+            await asyncio.sleep(0)
+
+        return prefetcher
+
+    prefetcher = asyncio.run(run())
+
+    # Half of the window of 4 stays free for regular requests, so the third prefetch is dropped.
+    assert fetched == ["a", "b"]
+    assert prefetcher.stats()["dropped"] == 1
+
+    limiter.in_flight = 0
+    limiter.waiters.append(None)
+
+    assert not limiter.spare(0.5)
+
+
+def test_info_prefetch_after_list(mocker) -> None:
+    info_cache.clear()
+    list_cache.clear()
+    mocker.patch.object(target=prefetcher, attribute="count", new=2)
+    mocker.patch.object(target=prefetcher, attribute="hits", new=0)
+    mocker.patch.object(target=prefetcher, attribute="prefetched", new=0)
+
+    dramas = [DramaSummary(title=f"{idx}", rating="-", mark_count=0, clip_count=0, series_id=idx, season_id=idx, link="") for idx in range(1, 4)]
+    search_scraper = mocker.Mock()
+    search_scraper.get_response.return_value = {"query": "", "results": {"dramas": dramas}, "heading": "", "scrape_date": ""}
+    mocker.patch(target="src.scrape.search_drama_scraper.SearchDramaScraper.scrape", return_value=search_scraper)
+
+    async def scrape(endpoint, req) -> object:
+        scraper = mocker.Mock()
+        scraper.get_response.return_value = {"series_id": req.path_params["drama_series_id"], "season_id": req.path_params["drama_season_id"], "data": {}}
+        return scraper
+
+    info_scrape = mocker.patch(target="src.scrape.info_drama_scraper.InfoDramaScraper.scrape", side_effect=scrape)
+
+    client.get("/list-drama/trend")
+    deadline = time.monotonic() + 2
+
+    while prefetcher.prefetched < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert info_scrape.await_count == 2
+    assert client.get("/dramas/1/1").headers["X-Cache"] == "HIT"
+    assert client.get("/dramas/3/3").headers["X-Cache"] == "MISS"
+    assert prefetcher.stats()["hit_rate"] == 0.5
+
+    info_cache.clear()
+    list_cache.clear()
+    prefetcher.clear()
@@ -0,0 +1,88 @@
+from src.scrape.prefetcher import Prefetcher
+from src.scrape.scrape_service import info_cache
+from src.utility.cache import SWRCache
+from src.utility.metrics import Counter, Histogram, Metrics
+from tests.test_utils import client
+from types import SimpleNamespace
+import asyncio
+
+
+def test_metrics_histogram_render() -> None:
+    histogram = Histogram("test_seconds", "Test histogram.", ("stage",))
+
+    for value in (0.003, 0.02, 0.02, 30.0):
+        histogram.observe(value, "fetch")
+
+    lines = list(histogram.render())
+
+    assert lines[:2] == ["# HELP test_seconds Test histogram.", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{stage="fetch",le="0.001"} 0' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="0.005"} 1' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="0.025"} 3' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="10.0"} 3' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="+Inf"} 4' in lines
+    assert 'test_seconds_sum{stage="fetch"} 30.043' in lines
+    assert 'test_seconds_count{stage="fetch"} 4' in lines
+
+
+def test_metrics_counter_escapes_labels() -> None:
+    counter = Counter("test_total", "Test counter.", ("path",))
+    counter.inc('a"b')
+    counter.inc('a"b', value=2)
+
+    assert list(counter.render())[-1] == 'test_total{path="a\\"b"} 3'
+
+
+def test_metrics_endpoint(mocker) -> None:
+    info_cache.clear()
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = {"series_id": 1, "season_id": 2, "data": {"title": "test"}, "scrape_date": ""}
+    mocker.patch(target="src.scrape.info_drama_scraper.InfoDramaScraper.scrape", return_value=scraper)
+    endpoint = "/dramas/{drama_series_id}/{drama_season_id}"
+    hits = info_cache.hits
+
+    for _ in range(2):
+        assert client.get("/dramas/1/2").status_code == 200
+
+    resp = client.get("/metrics")
+    lines = resp.text.splitlines()
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert f'markuapi_request_duration_seconds_count{{endpoint="{endpoint}",method="GET",status="200"}} {sum(Metrics.requests.series[(endpoint, "GET", "200")][:-1])}' in lines
+    assert any(line.startswith(f'markuapi_stage_duration_seconds_count{{endpoint="{endpoint}",stage="extract"}}') for line in lines)
+    assert any(line.startswith(f'markuapi_stage_duration_seconds_count{{endpoint="{endpoint}",stage="encode"}}') for line in lines)
+    assert f'markuapi_cache_hits_total{{cache="info"}} {hits + 1}' in lines
+    assert any(line.startswith('markuapi_upstream_breaker_state{upstream="filmarks",state=') for line in lines)
+    assert "markuapi_requests_in_flight 1" in lines
+
+    info_cache.clear()
+
+
+def test_metrics_unmatched_route() -> None:
+    client.get("/unknown")
+
+    assert ("unmatched", "GET", "404") in Metrics.requests.series
+
+
+def test_metrics_background_tasks() -> None:
+    async def load(key=None) -> int:
+        with Metrics.stage("test_background"):
+            return 1
+
+    async def run() -> None:
+        cache = SWRCache(max_entries=4, ttl=0.01, stale_ttl=60)
+        prefetcher = Prefetcher(count=1, concurrency=1, queue_size=1, fetch=load, is_cached=lambda key: False)
+        Metrics.scope.set({"route": SimpleNamespace(path="/test")})
+
+        await cache.get("key", load)
+        await asyncio.sleep(0.02)
+        await cache.get("key", load)
+        await cache.refreshing["key"]
+        prefetcher.schedule(["key"])
+        await asyncio.gather(*prefetcher.workers)
+
+    asyncio.run(run())
+
+    assert sum(Metrics.stages.series[("/test", "test_background")][:-1]) == 1
+    assert sum(Metrics.stages.series[("background", "test_background")][:-1]) == 2
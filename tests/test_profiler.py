@@ -0,0 +1,92 @@
+from src.scrape.base_scraper import BaseScraper
+from src.scrape.scrape_service import info_cache
+from src.utility.profiler import Profiler
+from tests.test_utils import client, get_json_val
+import pytest
+
+
+def mock_info_scrape(mocker) -> None:
+    info_cache.clear()
+    scraper = mocker.Mock()
+    scraper.get_response.return_value = {"series_id": 1, "season_id": 2, "data": {"title": "test"}, "scrape_date": ""}
+    mocker.patch(target="src.scrape.info_drama_scraper.InfoDramaScraper.scrape", return_value=scraper)
+
+
+@pytest.mark.parametrize("test_data", [
+    ("/dramas/1/2?__profile=1", {"X-Profile-Token": "secret"}, True),
+    ("/dramas/1/2", {"X-Profile": "1", "X-Profile-Token": "secret"}, True),
+    ("/dramas/1/2?__profile=1", {"X-Profile-Token": "wrong"}, False),
+    ("/dramas/1/2?__profile=1", {}, False),
+])
+def test_profile_on_demand(mocker, test_data) -> None:
+    mocker.patch(target="src.utility.profiler.Config.Profile.TOKEN", new="secret")
+    mock_info_scrape(mocker)
+
+    resp = client.get(test_data[0], headers=test_data[1])
+
+    assert resp.status_code == 200
+
+    if test_data[2]:
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert resp.headers["X-Profile-Status"] == "200"
+        assert "GET /dramas/1/2 took" in resp.text
+        assert "_info_scrape_drama" in resp.text
+    else:
+        assert get_json_val(resp.json(), "$.data.title") == "test"
+
+    info_cache.clear()
+
+
+def test_profile_disabled_without_token(mocker) -> None:
+    mocker.patch(target="src.utility.profiler.Config.Profile.TOKEN", new="")
+    mock_info_scrape(mocker)
+
+    resp = client.get("/dramas/1/2?__profile=1", headers={"X-Profile-Token": ""})
+
+    assert get_json_val(resp.json(), "$.data.title") == "test"
+    assert client.get("/profiles").status_code == 404
+    info_cache.clear()
+
+
+def test_profile_refuses_concurrent(mocker) -> None:
+    mocker.patch(target="src.utility.profiler.Config.Profile.TOKEN", new="secret")
+    mocker.patch.object(target=Profiler, attribute="active", new=True)
+
+    resp = client.get("/dramas/1/2?__profile=1", headers={"X-Profile-Token": "secret"})
+
+    assert resp.status_code == 409
+
+
+@pytest.mark.parametrize("test_data", [
+    (0.0, 1),
+    (60.0, 0),
+])
+def test_profile_sampled_slow_requests(mocker, test_data) -> None:
+    mocker.patch(target="src.utility.profiler.Config.Profile.TOKEN", new="secret")
+    mocker.patch(target="src.utility.profiler.Config.Profile.SAMPLE_RATE", new=2)
+    mocker.patch(target="src.utility.profiler.Config.Profile.SLOW_THRESHOLD", new=test_data[0])
+    mocker.patch.object(target=Profiler, attribute="requests", new=0)
+    Profiler.profiles.clear()
+    mock_info_scrape(mocker)
+
+    for _ in range(3):
+        assert client.get("/dramas/1/2").status_code == 200
+
+    resp = client.get("/profiles", headers={"X-Profile-Token": "secret"})
+    profiles = resp.json()["profiles"]
+
+    assert len(profiles) == test_data[1]
+
+    if profiles:
+        assert profiles[0]["path"] == "/dramas/1/2"
+        assert "took" in profiles[0]["report"]
+
+    Profiler.profiles.clear()
+    info_cache.clear()
+
+
+def test_profile_param_not_forwarded() -> None:
+    url, params = BaseScraper._locate({"path": "search/dramas", "type": "query"}, {}, {"q": "test", "__profile": "1"})
+
+    assert "__profile" not in url
+    assert params == {"q": "test"}
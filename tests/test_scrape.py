@@ -0,0 +1,719 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException, Request
+from httpx import ConnectError
+from itertools import islice
+from multiprocessing import get_context
+from src.scrape.base_scraper import BaseScraper
+from src.scrape.extract_pool import ExtractPool
+from src.scrape.http_client import HttpClient
+from src.scrape.info_drama_scraper import InfoDramaScraper
+from src.scrape.parser import Parser, Regions
+from src.scrape.search_drama_scraper import SearchDramaScraper
+from src.scrape.scrape_service import info_cache
+from src.utility.breaker import CircuitBreaker
+from src.utility.deadline import DeadlineMiddleware
+from src.utility.hedge import Hedger
+from src.utility.limiter import AdaptiveLimiter, TokenBucket
+from src.utility.lib import MsgSpecJSONResponse
+from tests.test_utils import client as test_client, get_json_val
+from urllib.parse import parse_qs, urlparse
+from src.utility.models import DramaSummary, Filmarks
+from src.utility.single_flight import SingleFlight
+from time import monotonic, sleep
+from typing import List
+import asyncio
+import msgspec
+import pytest
+
+
+def create_breaker() -> CircuitBreaker:
+    return CircuitBreaker(name="test", window=10, min_requests=4, failure_rate=0.5, slow_call=1, open_duration=5, probes=2)
+
+
+def create_request(path_params: dict | None = None, query_string: bytes = b"") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [],
+        "path_params": path_params or {},
+        "query_string": query_string,
+    })
+
+
+def scrape_fixture(mocker, parser: str, scraper_cls: type, path: str, params: dict, partial: bool = False) -> bytes:
+    mocker.patch.object(target=BaseScraper, attribute="parser", new=Parser.create(parser))
+
+    with open(file=path, mode="r", encoding="utf-8") as f:
+        html = scraper_cls.regions.slice(f.read()) if partial else f.read()
+        scraper = scraper_cls(BaseScraper.parser.parse(html), params)
+
+    if isinstance(scraper, InfoDramaScraper):
+        scraper.set_info_data()
+        return MsgSpecJSONResponse.render(scraper.data)
+
+    scraper.set_search_results()
+    return MsgSpecJSONResponse.render([scraper.search_results, scraper.search_heading])
+
+
+def test_single_flight_shares_result() -> None:
+    flights = SingleFlight()
+    calls = []
+
+    async def func() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run() -> list:
+        return await asyncio.gather(*(flights.do("key", func) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "collapsed": 4}
+
+
+def test_single_flight_shares_exception() -> None:
+    flights = SingleFlight()
+
+    async def func() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("Testing - shared exception")
+
+    async def run() -> list:
+        return await asyncio.gather(*(flights.do("key", func) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "collapsed": 2}
+
+
+def test_limiter_aimd_window() -> None:
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=8, latency_target=1.0)
+
+    async def run() -> None:
+        for _ in range(4):
+            await limiter.acquire(monotonic() + 1)
+
+        started = monotonic()
+        limiter.release(started, overloaded=False)
+        assert limiter.limit == 4.25
+
+        await limiter.acquire(monotonic() + 1)
+        limiter.release(started, overloaded=True)
+        assert limiter.limit == pytest.approx(4.25 * AdaptiveLimiter.backoff)
+
+        # Sent under the previous window, so it does not back off a second time.
+        limiter.release(started, overloaded=True)
+        for _ in range(2):
+            limiter.release(monotonic(), overloaded=None)
+
+        assert limiter.limit == pytest.approx(4.25 * AdaptiveLimiter.backoff)
+
+    asyncio.run(run())
+    assert limiter.stats() == {"limit": 2.97, "in_flight": 0, "queued": 0, "increases": 1, "decreases": 1, "rejected": 0}
+
+
+def test_limiter_queue_deadline() -> None:
+    limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1, latency_target=1.0)
+
+    async def run() -> None:
+        await limiter.acquire(monotonic() + 1)
+
+        with pytest.raises(TimeoutError):
+            await limiter.acquire(monotonic() + 0.01)
+
+        waiter = asyncio.create_task(limiter.acquire(monotonic() + 1))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == 1
+
+        limiter.release(monotonic(), overloaded=False)
+        await waiter
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_limiter_token_bucket() -> None:
+    bucket = TokenBucket(rate=100, burst=2)
+
+    async def run() -> float:
+        start = monotonic()
+
+        for _ in range(3):
+            await bucket.acquire(monotonic() + 1)
+
+        with pytest.raises(TimeoutError):
+            await bucket.acquire(monotonic() + 0.001)
+
+        return monotonic() - start
+
+    assert asyncio.run(run()) >= 0.009
+    assert bucket.stats() == {"rate": 100, "throttled": 1, "rejected": 1}
+
+
+@pytest.mark.parametrize("test_data", [
+    (503, 1),
+    (429, 1),
+    (200, 0),
+])
+def test_limiter_http_client_backs_off(mocker, test_data) -> None:
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=8, latency_target=1.0)
+    mocker.patch.object(target=HttpClient, attribute="limiter", new=limiter)
+    mocker.patch.object(target=HttpClient, attribute="breaker", new=create_breaker())
+    client = mocker.patch.object(target=HttpClient, attribute="client")
+    client.get = mocker.AsyncMock(return_value=mocker.Mock(status_code=test_data[0]))
+
+    try:
+        resp = asyncio.run(HttpClient.get(url="https://filmarks.com/", headers={}))
+        status = resp.status_code
+
+    except HTTPException as e:
+        status = e.status_code
+
+    assert status == (503 if test_data[1] else 200)
+    assert limiter.decreases == test_data[1]
+    assert limiter.in_flight == 0
+
+
+def test_limiter_http_client_rejects_when_queued(mocker) -> None:
+    limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1, latency_target=1.0)
+    limiter.in_flight = 1
+    mocker.patch.object(target=HttpClient, attribute="limiter", new=limiter)
+    mocker.patch.object(target=HttpClient, attribute="breaker", new=create_breaker())
+    mocker.patch(target="src.scrape.http_client.Config.Upstream.QUEUE_TIMEOUT", new=0.01)
+    client = mocker.patch.object(target=HttpClient, attribute="client")
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(HttpClient.get(url="https://filmarks.com/", headers={}))
+
+    assert e.value.status_code == 503
+    assert client.get.call_count == 0
+    assert HttpClient.breaker.probing == 0
+
+
+def test_breaker_opens_and_recovers(mocker) -> None:
+    now = mocker.patch("src.utility.breaker.monotonic", return_value=100.0)
+    breaker = create_breaker()
+
+    for failed in (False, True, False, True):
+        assert breaker.allow()
+        breaker.record(100.0, failed)
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now.return_value = 105.0
+    assert [breaker.allow() for _ in range(3)] == [True, True, False]
+
+    breaker.record(105.0, False)
+    breaker.record(105.0, False)
+    assert breaker.state == "closed"
+    assert breaker.stats() == {"state": "closed", "requests": 0, "failures": 0, "opens": 1, "rejected": 2}
+
+
+def test_breaker_slow_calls_and_failed_probe(mocker) -> None:
+    now = mocker.patch("src.utility.breaker.monotonic", return_value=100.0)
+    breaker = create_breaker()
+
+    for _ in range(4):
+        breaker.record(98.0, False)
+
+    assert breaker.state == "open"
+
+    now.return_value = 105.0
+    assert breaker.allow()
+
+    # Finished after the circuit half-opened, but was sent before it did.
+    breaker.record(99.0, True)
+    assert breaker.state == "half-open"
+
+    breaker.record(105.0, True)
+    assert breaker.state == "open"
+    assert breaker.opens == 2
+
+
+def test_breaker_http_client_fails_fast(mocker) -> None:
+    breaker = create_breaker()
+    mocker.patch.object(target=HttpClient, attribute="breaker", new=breaker)
+    mocker.patch.object(target=HttpClient, attribute="limiter", new=AdaptiveLimiter(initial=4, minimum=1, maximum=8, latency_target=1.0))
+    client = mocker.patch.object(target=HttpClient, attribute="client")
+    client.get = mocker.AsyncMock(side_effect=ConnectError("Testing - upstream down"))
+
+    async def run() -> List[int | str]:
+        results = []
+
+        for _ in range(6):
+            try:
+                await HttpClient.get(url="https://filmarks.com/", headers={})
+
+            except HTTPException as e:
+                results.append(e.status_code)
+
+            except ConnectError:
+                results.append("error")
+
+        return results
+
+    assert asyncio.run(run()) == ["error"] * 4 + [503] * 2
+    assert client.get.await_count == 4
+
+
+@pytest.mark.parametrize("test_data", [
+    ("/dramas/1/2", [], 10.0),
+    ("/dramas/batch", [], 60.0),
+    ("/list-drama/trend", [(b"x-request-timeout", b"2.5")], 2.5),
+    ("/search/dramas", [(b"x-request-timeout", b"600")], 60.0),
+    ("/search/dramas", [(b"x-request-timeout", b"soon")], 10.0),
+    ("/", [], 0.0),
+])
+def test_deadline_budget(test_data) -> None:
+    middleware = DeadlineMiddleware(app=None)
+
+    assert middleware.budget({"type": "http", "path": test_data[0], "headers": test_data[1]}) == test_data[2]
+
+
+def test_deadline_cuts_slow_fetch(mocker) -> None:
+    info_cache.clear()
+    BaseScraper.pages.clear()
+    breaker = create_breaker()
+    mocker.patch.object(target=HttpClient, attribute="breaker", new=breaker)
+    mocker.patch.object(target=HttpClient, attribute="limiter", new=AdaptiveLimiter(initial=4, minimum=1, maximum=8, latency_target=1.0))
+    client = mocker.patch.object(target=HttpClient, attribute="client")
+
+    async def get(url: str, headers: dict) -> object:
+        await asyncio.sleep(0.3)
+
+    client.get = get
+    start = monotonic()
+    resp = test_client.get("/dramas/7/7", headers={"X-Request-Timeout": "0.05"})
+
+    assert resp.status_code == 504
+    assert monotonic() - start < 0.25
+
+    # The fetch itself is shared, so it runs to completion without the caller.
+    while BaseScraper.flights.calls:
+        sleep(0.01)
+
+    assert HttpClient.limiter.in_flight == 0
+
+
+def test_deadline_not_shared_by_flight(mocker) -> None:
+    info_cache.clear()
+    BaseScraper.pages.clear()
+    mocker.patch.object(target=HttpClient, attribute="breaker", new=create_breaker())
+
+    with open(file="tests/___info_drama.html", mode="r", encoding="utf-8") as f:
+        html = f.read()
+
+    async def get(url: str, headers: dict) -> object:
+        await asyncio.sleep(0.2)
+        return mocker.Mock(text=html)
+
+    fetch = mocker.patch(target="src.scrape.base_scraper.HttpClient.get", side_effect=get)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        short = executor.submit(test_client.get, "/dramas/11358/15763", headers={"X-Request-Timeout": "0.05"})
+        sleep(0.02)
+        normal = executor.submit(test_client.get, "/dramas/11358/15763")
+
+        assert short.result().status_code == 504
+        assert normal.result().status_code == 200
+        assert get_json_val(normal.result().json(), "$.data.title") == "魔女ユヒ"
+
+    assert fetch.await_count == 1
+
+    info_cache.clear()
+
+
+def test_hedger_races_slow_attempt() -> None:
+    hedger = Hedger(percent=100, quantile=0.95, min_delay=0.01, min_samples=4)
+    delays = [0.5, 0.01]
+
+    for _ in range(4):
+        hedger.record(0.02)
+
+    async def attempt() -> float:
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    async def run() -> float:
+        return await hedger.run(attempt)
+
+    start = monotonic()
+
+    assert asyncio.run(run()) == 0.01
+    assert monotonic() - start < 0.2
+    assert hedger.stats() == {"delay": 0.02, "requests": 1, "hedged": 1, "wins": 1}
+
+
+def test_hedger_budget_and_deadline() -> None:
+    hedger = Hedger(percent=50, quantile=0.95, min_delay=0.001, min_samples=1)
+    hedger.record(0.001)
+    calls = []
+
+    async def attempt() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run() -> None:
+        for _ in range(4):
+            await hedger.run(attempt)
+
+        # Not enough of the deadline left to wait for the hedge delay.
+        await hedger.run(attempt, remaining=0.0005)
+
+    asyncio.run(run())
+    assert hedger.hedged == 2
+    assert len(calls) == 7
+
+
+def test_hedger_raises_when_all_attempts_fail() -> None:
+    hedger = Hedger(percent=100, quantile=0.95, min_delay=0.001, min_samples=1)
+    hedger.record(0.001)
+
+    async def attempt() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("Testing - attempt failed")
+
+    with pytest.raises(ValueError):
+        asyncio.run(hedger.run(attempt))
+
+    assert hedger.hedged == 1
+
+
+@pytest.mark.parametrize("test_data", [
+    (
+        "<html><body><div class='p-content-detail__head'></div></body></html>",
+        None,
+    ),
+    (
+        "<html><body><p class='main__status-ja'>お探しのページは見つかりません。</p></body></html>",
+        404,
+    ),
+])
+def test_scrape_coalesces_same_url(mocker, test_data) -> None:
+    async def get(url: str, headers: dict) -> object:
+        await asyncio.sleep(0.01)
+        return mocker.Mock(text=test_data[0])
+
+    http_get = mocker.patch(target="src.scrape.base_scraper.HttpClient.get", side_effect=get)
+    req = create_request(path_params={"drama_series_id": "1", "drama_season_id": "2"})
+
+    async def run() -> list:
+        return await asyncio.gather(
+            *(InfoDramaScraper.scrape(Filmarks.Endpoints.INFO_DRAMAS.value, req) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+    collapsed = BaseScraper.flights.collapsed
+    results = asyncio.run(run())
+
+    assert http_get.await_count == 1
+    assert BaseScraper.flights.collapsed - collapsed == 4
+
+    if test_data[1] is None:
+        assert all(isinstance(result, InfoDramaScraper) for result in results)
+        assert len({id(result.soup) for result in results}) == 1
+    else:
+        assert all(isinstance(result, HTTPException) and result.status_code == test_data[1] for result in results)
+
+
+@pytest.mark.parametrize("test_data", [
+    ({"etag": '"v1"'}, 304, "<p class='x'>1</p>", {"If-None-Match": '"v1"'}, 1),
+    ({"last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, 304, "<p class='x'>1</p>", {"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}, 1),
+    ({}, 200, "<p class='x'>1</p>", {}, 1),
+    ({}, 200, "<p class='x'>2</p>", {}, 2),
+])
+def test_scrape_revalidates_upstream(mocker, test_data) -> None:
+    BaseScraper.pages.clear()
+    mocker.patch(target="src.scrape.base_scraper.Config.Scrape.PARTIAL_PARSE", new=False)
+    responses = [
+        mocker.Mock(status_code=200, text="<p class='x'>1</p>", headers=test_data[0]),
+        mocker.Mock(status_code=test_data[1], text=test_data[2] if test_data[1] == 200 else "", headers=test_data[0]),
+    ]
+    http_get = mocker.patch(target="src.scrape.base_scraper.HttpClient.get", side_effect=responses)
+    parse = mocker.spy(BaseScraper.parser, "parse")
+    url = Filmarks.create_filmarks_link("/dramas/1/2")
+
+    async def run() -> list:
+        return [await BaseScraper._fetch(url) for _ in range(2)]
+
+    first, second = asyncio.run(run())
+
+    assert http_get.call_args_list[1].kwargs["headers"] == {**BaseScraper.headers, **test_data[3]}
+    assert parse.call_count == test_data[4]
+    assert (first is second) == (test_data[4] == 1)
+    BaseScraper.pages.clear()
+
+
+@pytest.mark.parametrize("test_data", [
+    (InfoDramaScraper, "bs4", 1),
+    (InfoDramaScraper, "lxml", 1),
+    (SearchDramaScraper, "bs4", 1),
+    (SearchDramaScraper, "lxml", 0),
+])
+def test_scrape_partial_parse_per_parser(mocker, test_data) -> None:
+    BaseScraper.pages.clear()
+    mocker.patch.object(target=BaseScraper, attribute="parser", new=Parser.create(test_data[1]))
+    mocker.patch(target="src.scrape.base_scraper.HttpClient.get", return_value=mocker.Mock(status_code=200, text="<p class='x'>1</p>", headers={}))
+    slice_html = mocker.spy(test_data[0].regions, "slice")
+
+    asyncio.run(test_data[0]._fetch_page(Filmarks.create_filmarks_link("/dramas/1/2")))
+
+    assert slice_html.call_count == test_data[2]
+
+
+@pytest.mark.parametrize("test_data", [
+    (b"limit=10", [1], 10),
+    (b"limit=5&page=3", [3], 5),
+    (b"limit=45", [1, 2, 3], 45),
+    (b"limit=40&page=2", [3, 4], 40),
+    (b"limit=100&page=2", [6, 7, 8, 9, 10], 50),
+])
+def test_scrape_search_fan_out(mocker, test_data) -> None:
+    mocker.patch(target="src.scrape.search_scraper.Config.Scrape.PAGE_SIZE", new=20)
+    requested = []
+
+    async def get(url: str, headers: dict) -> object:
+        page = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        requested.append(page)
+
+        if page > 8:
+            return mocker.Mock(text="<p class='main__status-ja'>お探しのページは見つかりません。</p>")
+
+        cassettes = "".join(f"<div class='js-cassette' data-id='{page}-{idx}'></div>" for idx in range(20 if page < 8 else 10))
+        return mocker.Mock(text=f"<h1 class='c-heading-1'>{page}</h1><div class='p-contents-grid'>{cassettes}</div>")
+
+    mocker.patch(target="src.scrape.base_scraper.HttpClient.get", side_effect=get)
+    req = create_request(query_string=b"q=test&" + test_data[0])
+
+    scraper = asyncio.run(SearchDramaScraper.scrape(Filmarks.Endpoints.SEARCH_DRAMAS.value, req))
+    results = list(islice(scraper._iter_results(), int(scraper.results_limit)))
+
+    assert sorted(requested) == test_data[1]
+    assert len(results) == test_data[2]
+    assert results[0].attrs["data-id"] == f"{test_data[1][0]}-0"
+    assert scraper._get_heading() == str(test_data[1][0])
+
+
+def test_scrape_search_fan_out_cancels_on_error(mocker) -> None:
+    mocker.patch(target="src.scrape.search_scraper.Config.Scrape.PAGE_SIZE", new=20)
+    mocker.patch(target="src.scrape.search_scraper.Config.Scrape.PAGE_CONCURRENCY", new=2)
+    BaseScraper.pages.clear()
+    requested = []
+
+    async def get(url: str, headers: dict) -> object:
+        page = int(parse_qs(urlparse(url).query)["page"][0])
+        requested.append(page)
+
+        if page == 1:
+            raise ConnectError("Testing - connection failed")
+
+        await asyncio.sleep(0.05)
+        return mocker.Mock(text="<div class='p-contents-grid'></div>")
+
+    mocker.patch(target="src.scrape.base_scraper.HttpClient.get", side_effect=get)
+    req = create_request(query_string=b"q=test&limit=200")
+
+    async def run() -> int:
+        try:
+            await SearchDramaScraper.scrape(Filmarks.Endpoints.SEARCH_DRAMAS.value, req)
+
+        except HTTPException as e:
+            await asyncio.sleep(0.2)
+
+            return e.status_code
+
+    assert asyncio.run(run()) == 503
+    # Page 3 takes the slot page 1 frees before the failure reaches the caller; the rest never start.
+    assert sorted(requested) == [1, 2, 3]
+    BaseScraper.pages.clear()
+
+
+def test_scrape_search_stream_page_by_page(mocker) -> None:
+    mocker.patch(target="src.scrape.search_scraper.Config.Scrape.PAGE_SIZE", new=20)
+    BaseScraper.pages.clear()
+
+    with open(file="tests/___search_dramas.html", mode="r", encoding="utf-8") as f:
+        html = f.read()
+
+    async def run() -> tuple:
+        released = asyncio.Event()
+
+        async def get(url: str, headers: dict) -> object:
+            if parse_qs(urlparse(url).query)["page"] == ["2"]: await released.wait()
+            return mocker.Mock(text=html)
+
+        mocker.patch(target="src.scrape.base_scraper.HttpClient.get", side_effect=get)
+        scraper = await asyncio.wait_for(SearchDramaScraper.scrape_stream(Filmarks.Endpoints.SEARCH_DRAMAS.value, create_request(query_string=b"q=test&limit=30")), 1)
+        scraper.set_search_results(lazy=True)
+        dramas = scraper.search_results["dramas"]
+
+        # The whole first page is extracted while the second one is still loading.
+        first = [await asyncio.wait_for(anext(dramas), 1) for _ in range(20)]
+        released.set()
+
+        return first, [drama async for drama in dramas]
+
+    first, rest = asyncio.run(run())
+
+    assert [drama.title for drama in first] == [f"あなたの番です {idx}" for idx in range(20)]
+    assert [drama.title for drama in rest] == [f"あなたの番です {idx}" for idx in range(10)]
+    BaseScraper.pages.clear()
+
+
+def test_scrape_in_pool(mocker) -> None:
+    with open(file="tests/___info_drama.html", mode="r", encoding="utf-8") as f:
+        html = f.read()
+
+    async def get(url: str, headers: dict) -> object:
+        return mocker.Mock(text=html if "/1/" in url else "<p class='main__status-ja'>お探しのページは見つかりません。</p>")
+
+    mocker.patch(target="src.scrape.base_scraper.HttpClient.get", side_effect=get)
+    endpoint = Filmarks.Endpoints.INFO_DRAMAS.value
+
+    async def run() -> tuple:
+        scraper = await InfoDramaScraper.scrape(endpoint, create_request(path_params={"drama_series_id": "1", "drama_season_id": "2"}))
+        pooled = await InfoDramaScraper.scrape_in_pool(endpoint, create_request(path_params={"drama_series_id": "1", "drama_season_id": "2"}))
+
+        with pytest.raises(HTTPException) as e:
+            await InfoDramaScraper.scrape_in_pool(endpoint, create_request(path_params={"drama_series_id": "3", "drama_season_id": "4"}))
+
+        return scraper.extract(), pooled, e.value.status_code
+
+    ExtractPool.executor = ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn"))
+
+    try:
+        inline, pooled, status_code = asyncio.run(run())
+
+    finally:
+        ExtractPool.close()
+
+    assert msgspec.to_builtins(pooled["data"]) == msgspec.to_builtins(inline["data"])
+    assert status_code == 404
+
+
+@pytest.mark.parametrize("test_data", [
+    (InfoDramaScraper, "tests/___info_drama.html", {"drama_series_id": 11358, "drama_season_id": 15763}),
+    (SearchDramaScraper, "tests/___search_dramas.html", {"q": "あなたの番です", "limit": 100}),
+    (SearchDramaScraper, "tests/___search_dramas.html", {"q": "あなたの番です", "limit": 3}),
+])
+def test_scrape_parsers_identical_output(mocker, test_data) -> None:
+    expected = scrape_fixture(mocker, "bs4", *test_data)
+
+    assert scrape_fixture(mocker, "lxml", *test_data) == expected
+    assert scrape_fixture(mocker, "bs4", *test_data, partial=True) == expected
+    assert scrape_fixture(mocker, "lxml", *test_data, partial=True) == expected
+
+
+@pytest.mark.parametrize("test_data", [
+    (
+        "<head><link href='a'><link href='b'></head><div class='x head'><div>1</div></div><div class='head'>2</div>",
+        "<html><body><link href='a'><div class='x head'><div>1</div></div></body></html>",
+    ),
+    (
+        "<script>var s = '<div class=\"head\">';</script><!-- <div class='head'> --><div class='head'><p>1</p><script>'</div>'</script></div>",
+        "<html><body><div class='head'><p>1</p><script>'</div>'</script></div></body></html>",
+    ),
+    (
+        "<div class='head-title'>1</div><div class='head'><div class='head'>2</div></div><div>3</div>",
+        "<html><body><div class='head'><div class='head'>2</div></div></body></html>",
+    ),
+    (
+        "<p>no regions</p>",
+        "<html><body></body></html>",
+    ),
+    (
+        "<link href='a'><div class='head'><div>unbalanced</div>",
+        "<link href='a'><div class='head'><div>unbalanced</div>",
+    ),
+])
+def test_scrape_regions_slice(test_data) -> None:
+    assert Regions("div.head", "link").slice(test_data[0]) == test_data[1]
+
+
+@pytest.mark.parametrize("parser", ["bs4", "lxml"])
+def test_scrape_parser_scan(parser) -> None:
+    backend = Parser.create(parser)
+    root = backend.parse(
+        "<div class='card'>"
+        "<img src='a'><div class='poster'><img src='b'></div>"
+        "<h4 class='term other'>監督</h4><h4 class='term'>脚本</h4><h4>出演者</h4>"
+        "<div class='poster'><img src='c'></div>"
+        "</div>"
+    )
+
+    matches = [
+        (selector, backend.attr(node, "src") or backend.text(node))
+        for selector, node
+        in backend.scan(backend.select_one(root, "div.card"), ("div.poster > img", "h4.term"))
+    ]
+
+    assert matches == [("div.poster > img", "b"), ("h4.term", "監督"), ("h4.term", "脚本"), ("div.poster > img", "c")]
+
+
+@pytest.mark.parametrize("parser", ["bs4", "lxml"])
+def test_scrape_info_labels_index(mocker, parser) -> None:
+    mocker.patch.object(target=BaseScraper, attribute="parser", new=Parser.create(parser))
+    soup = BaseScraper.parser.parse(
+        "<div class='p-content-detail__head'>"
+        "<h3 class='p-content-detail__other-info-title'>公開日：2020年01月01日</h3>"
+        "<h3 class='p-content-detail__other-info-title'>公開日：2021年01月01日</h3>"
+        "<h3 class='p-content-detail__people-list-term'>監督</h3>"
+        "<h3 class='p-content-detail__genre-title'>ジャンル：</h3>"
+        "<h3 class='other'>脚本</h3>"
+        "</div>"
+    )
+
+    scraper = InfoDramaScraper(soup, {"drama_series_id": 1, "drama_season_id": 2})
+    scraper.labels = scraper._get_labels()
+
+    assert list(scraper.labels) == ["公開日：", "監督", "ジャンル："]
+    assert scraper._get_other_info("release_date") == "2020年01月01日"
+    assert scraper._get_people_list("scriptwriter") is None
+
+
+@pytest.mark.parametrize("test_data", [
+    (
+        Filmarks.create_person_info(name="a", link="/people/1", character="b"),
+        b'{"name":"a","character":"b","people_id":1,"link":"https://filmarks.com/people/1"}',
+    ),
+    (
+        Filmarks.create_person_info(name="a", link="/people/1"),
+        b'{"name":"a","people_id":1,"link":"https://filmarks.com/people/1"}',
+    ),
+    (
+        DramaSummary(title="a", rating="-", mark_count=1, clip_count=2, series_id=3, season_id=4, link="l", genre=["g"]),
+        b'{"title":"a","rating":"-","mark_count":1,"clip_count":2,"series_id":3,"season_id":4,"link":"l","genre":["g"]}',
+    ),
+])
+def test_scrape_models_encoding(test_data) -> None:
+    assert MsgSpecJSONResponse.render(test_data[0]) == test_data[1]
+
+
+def test_scrape_fixture_info_fields(mocker) -> None:
+    data = msgspec.json.decode(scrape_fixture(mocker, "lxml", InfoDramaScraper, "tests/___info_drama.html", {"drama_series_id": 11358, "drama_season_id": 15763}))
+
+    assert get_json_val(data, "$.title") == "魔女ユヒ"
+    assert get_json_val(data, "$.release_date") == "2007年04月02日"
+    assert get_json_val(data, "$.country_of_origin") == "韓国"
+    assert get_json_val(data, "$.playback_time") == "60分"
+    assert get_json_val(data, "$.synopsis") == "財閥の後継者ユヒと、その秘書ムリョン&仲間たちが織りなすラブコメディ。"
+    assert get_json_val(data, "$.director[0].people_id") == 903
+    assert get_json_val(data, "$.cast[6]") == {"name": "イ・チェヨン", "people_id": 194890, "link": "https://filmarks.com/people/194890"}
+
+
+@pytest.mark.parametrize("parser", ["bs4", "lxml"])
+def test_scrape_search_results_empty(mocker, parser) -> None:
+    mocker.patch.object(target=BaseScraper, attribute="parser", new=Parser.create(parser))
+    soup = BaseScraper.parser.parse("<html><body><div class='p-timeline__zero'>一致する情報は見つかりませんでした。</div></body></html>")
+
+    scraper = SearchDramaScraper(soup, {"q": "test"})
+    scraper.set_search_results()
+
+    assert scraper.search_results == {"dramas": []}
+    assert scraper.search_heading == ""
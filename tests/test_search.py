@@ -1,4 +1,7 @@
 from random import choice
+from src.scrape.drama_index import DramaIndex
+from src.scrape.scrape_service import drama_index
+from src.utility.models import DramaInfo, DramaSummary
 from tests.test_utils import client, get_json_val
 import json
 import pytest
@@ -229,3 +232,94 @@ def test_search_with_results_random() -> None:
     assert get_json_val(resp_data, "$.results.dramas[0].series_id") is not None
     assert get_json_val(resp_data, "$.results.dramas[0].season_id") is not None
     assert get_json_val(resp_data, "$.results.dramas[0].link") is not None
+
+
+@pytest.mark.parametrize("test_data", [
+    ("/search/dramas?q=あなたの番です&limit=3&stream=1", {}),
+    ("/search/dramas?q=あなたの番です&limit=3&stream=yes", {}),
+    ("/search/dramas?q=あなたの番です&limit=3", {"Accept": "application/x-ndjson"}),
+])
+def test_search_stream(mocker, test_data) -> None:
+    with open(file="tests/___search_dramas.html", mode="r", encoding="utf-8") as f:
+        html = f.read()
+
+    http_get = mocker.patch(target="src.scrape.base_scraper.HttpClient.get", return_value=mocker.Mock(text=html))
+
+    resp = client.get(test_data[0], headers=test_data[1])
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+
+    assert resp.status_code == 200
+    assert resp.headers["Content-Type"] == "application/x-ndjson"
+    assert "stream" not in http_get.call_args.kwargs["url"]
+
+    assert get_json_val(lines[0], "$.query") == "あなたの番です"
+    assert get_json_val(lines[0], "$.results") is None
+    assert [get_json_val(line, "$.title") for line in lines[1:]] == ["あなたの番です 0", "あなたの番です 1", "あなたの番です 2"]
+
+    resp = client.get("/search/dramas?q=あなたの番です&limit=3")
+    assert get_json_val(resp.json(), "$.results.dramas") == lines[1:]
+
+
+def test_search_stream_not_found(mocker) -> None:
+    mocker.patch(
+        target="src.scrape.base_scraper.HttpClient.get",
+        return_value=mocker.Mock(text="<p class='main__status-ja'>お探しのページは見つかりません。</p>"),
+    )
+
+    resp = client.get("/search/dramas?q=test&stream=1")
+
+    assert resp.status_code == 404
+
+
+def test_search_local(mocker) -> None:
+    drama_index.clear()
+
+    with open(file="tests/___search_dramas.html", mode="r", encoding="utf-8") as f:
+        http_get = mocker.patch(target="src.scrape.base_scraper.HttpClient.get", return_value=mocker.Mock(text=f.read()))
+
+    client.get("/search/dramas?q=あなたの番です&limit=20")
+    calls = http_get.await_count
+
+    resp = client.get("/search/dramas?q=番です 1&source=local&limit=5")
+    resp_data = resp.json()
+    dramas = get_json_val(resp_data, "$.results.dramas")
+
+    assert resp.status_code == 200
+    assert http_get.await_count == calls
+    assert get_json_val(resp_data, "$.heading") == "番です 1の検索結果"
+    assert len(dramas) == 5
+    assert all(drama["title"].startswith("あなたの番です 1") for drama in dramas)
+    assert [drama["rating"] for drama in dramas] == sorted((drama["rating"] for drama in dramas), reverse=True)
+
+    resp = client.get("/search/dramas?q=ＴＡＮＡＫＡ&source=local")
+    assert get_json_val(resp.json(), "$.results.dramas") == []
+    assert get_json_val(resp.json(), "$.heading") == ""
+
+    resp = client.get("/search/dramas?q=田中圭&source=local&limit=100")
+    assert len(get_json_val(resp.json(), "$.results.dramas")) == 18
+
+    drama_index.clear()
+
+
+def test_search_local_ranking() -> None:
+    def drama(idx: int, title: str, rating: float | str = 3.0, mark_count: int = 0, **kwargs) -> DramaSummary:
+        return DramaSummary(title=title, rating=rating, mark_count=mark_count, clip_count=0, series_id=idx, season_id=idx, link="", **kwargs)
+
+    index = DramaIndex(max_dramas=4)
+    index.add(drama(1, "Other", cast=["Ｋｏｄａ Ｍｉｋｉ"]))
+    index.add(drama(2, "Koda Story", rating="-", mark_count=10))
+    index.add(drama(3, "The Koda Story", rating=4.0))
+    index.add(drama(4, "Story", genre=["koda"]))
+    index.add_info(4, 4, DramaInfo(
+        title="Story", original_title="Koda", rating=3.0, mark_count=0, clip_count=0, link="",
+        production_year_series="", production_year="", genre=["koda"],
+    ))
+
+    assert [d.series_id for d in index.search("KODA", limit=10)] == [2, 3, 4, 1]
+    assert [d.series_id for d in index.search("koda", limit=2, page=2)] == [4, 1]
+    assert [d.series_id for d in index.search("k", limit=10)] == [2, 3, 4, 1]
+    assert [d.series_id for d in index.search("odast", limit=10)] == [3, 2]
+
+    index.add(drama(5, "Koda 5"))
+    assert 1 not in {d.series_id for d in index.search("koda", limit=10)}
+    assert all((1, 1) not in keys for keys in index.postings.values())